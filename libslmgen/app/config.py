@@ -16,15 +16,16 @@ Contributor: Vedant Singh Rajput <teleported0722@gmail.com>
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
-from pathlib import Path
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """App configuration loaded from Environment."""
     
     # CORS settings - where the frontend Lives
-    # Comma-separated list of allowed origins
+    # Comma-separated list of allowed origins (wildcards like https://*.vercel.app work)
     allowed_origins: str = "http://localhost:3000,https://slmgen.vercel.app"
     
     # File storage stuff
@@ -40,9 +41,12 @@ class Settings(BaseSettings):
     
     # Security settings
     max_upload_bytes: int = 100 * 1024 * 1024  # 100 MB
-    rate_limit_per_minute: int = 60  # General rate limit
-    upload_rate_limit_per_minute: int = 10  # Stricter for uploads
+    # Both must be > 0 - the limiter refills at per_minute/60 tokens a second
+    rate_limit_per_minute: int = Field(default=60, gt=0)  # General rate limit
+    upload_rate_limit_per_minute: int = Field(default=10, gt=0)  # Stricter for uploads
     download_token_ttl_minutes: int = 60  # Download token validity
+    jwt_cache_size: int = 4096  # Verified JWT payloads kept in memory
+    jwt_cache_ttl: int = 60  # Seconds a verified payload is reused (never past exp)
     
     # =========================================================================
     # Local Development Mode
@@ -64,13 +68,24 @@ class Settings(BaseSettings):
     # =========================================================================
     auth_disabled: bool = False
     
-    class Config:
-        env_file = ".env"
-        extra = "ignore"  # ignore extra env Vars
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        extra="ignore",  # ignore extra env Vars
+        frozen=True,  # read-only after startup, safe to share across Threads
+    )
 
 
-# Global settings Instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Build the Settings exactly once.
+
+    pydantic-settings re-reads the environment and .env on every Settings(),
+    so anything that needs config should come through here (or use the
+    module-level `settings` below, which is the same Object).
+    """
+    return Settings()
 
-# Make sure upload directory Exists
-Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
+
+# Global settings Instance
+settings = get_settings()
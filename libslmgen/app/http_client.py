@@ -0,0 +1,46 @@
+"""
+Shared HTTP Client.
+
+One httpx.AsyncClient per process, created in the app lifespan and handed
+to whatever needs outbound HTTP (JWKS fetches, etc.) as a Dependency.
+"""
+# Author: Eshan Roy <eshanized@proton.me>
+# License: MIT License
+# Copyright (c) 2026 Eshan Roy
+
+import httpx
+from starlette.requests import Request
+
+# Used only when there's no app.state.http (scripts, tests, code running
+# outside a request) - created on first use
+_fallback_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Build the process-wide Client.
+
+    HTTP/2 + keep-alive means repeat calls to the same host (Supabase)
+    reuse a warm TLS connection instead of handshaking every Time.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=5.0,
+        limits=httpx.Limits(max_keepalive_connections=4),
+    )
+
+
+def get_fallback_client() -> httpx.AsyncClient:
+    """Client for callers that don't have the app's one to Hand."""
+    global _fallback_client
+    if _fallback_client is None or _fallback_client.is_closed:
+        _fallback_client = create_http_client()
+    return _fallback_client
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency: the lifespan-scoped client on app.state.http."""
+    client = getattr(request.app.state, "http", None)
+    if client is None:
+        return get_fallback_client()
+    return client
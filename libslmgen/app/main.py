@@ -14,16 +14,24 @@ Handles CORS, routing, rate limiting, and lifecycle events.
 from dotenv import load_dotenv
 load_dotenv()
 
-import logging  # noqa: E402
-from contextlib import asynccontextmanager  # noqa: E402
-from fastapi import FastAPI  # noqa: E402
-from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
-from slowapi.errors import RateLimitExceeded  # noqa: E402
-
-from app.config import settings  # noqa: E402
-from app.session import session_manager  # noqa: E402
-from app.middleware.rate_limit import limiter, rate_limit_exceeded_handler  # noqa: E402
-from app.routers import upload, analyze, recommend, generate, jobs, preview, advanced  # noqa: E402
+import asyncio
+import logging
+import os
+import re
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from app.config import settings
+from app.http_client import create_http_client
+from app.middleware.auth import run_jwks_refresh
+from app.middleware.cors import CachedCORSMiddleware
+from app.middleware.health import HealthCheckMiddleware
+from app.middleware.rate_limit import TokenBucketMiddleware, run_bucket_eviction
+from app.routers import advanced, analyze, generate, jobs, preview, recommend, upload
+from app.session import run_session_sweeper, session_manager
+from app.supabase import close_supabase_client
 
 # Setup Logging
 logging.basicConfig(
@@ -38,11 +46,28 @@ async def lifespan(app: FastAPI):
     """Handle startup and shutdown Events."""
     # Startup
     logger.info("🚀 SLMGEN Backend starting up...")
+    Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
     logger.info(f"📁 Upload directory: {settings.upload_dir}")
     logger.info(f"🌐 Allowed origins: {settings.allowed_origins}")
     logger.info(f"🔒 Rate limit: {settings.rate_limit_per_minute}/min, Upload: {settings.upload_rate_limit_per_minute}/min")
+    eviction_task = asyncio.create_task(run_bucket_eviction())
+    # Expired sessions are swept here instead of on every Request
+    sweeper_task = asyncio.create_task(run_session_sweeper())
+    # One outbound HTTP client for the whole process (JWKS fetches etc.)
+    app.state.http = create_http_client()
+    # Keep signing keys warm so no request pays for a JWKS fetch
+    background_tasks = [eviction_task, sweeper_task]
+    if not settings.auth_disabled and os.environ.get("SUPABASE_URL"):
+        background_tasks.append(asyncio.create_task(run_jwks_refresh(app.state.http)))
     yield
     # Shutdown
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await app.state.http.aclose()
+    close_supabase_client()
     logger.info("👋 SLMGEN Backend shutting down...")
 
 
@@ -54,15 +79,26 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Add rate limiter state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+# Token-bucket rate limiting (added before CORS so CORS stays outermost -
+# preflights skip the limiter and 429s still carry CORS headers)
+app.add_middleware(TokenBucketMiddleware)
 
 # Configure CORS with restricted methods and headers
-origins = [origin.strip() for origin in settings.allowed_origins.split(",")]
+origins = [origin.strip() for origin in settings.allowed_origins.split(",") if origin.strip()]
+
+# Exact origins become a set lookup; wildcard ones (https://*.vercel.app)
+# are folded into a single regex, and skipped entirely when there are none
+# (a bare "*" stays exact so Starlette's allow-all path still applies)
+origins_exact = frozenset(o for o in origins if "*" not in o or o == "*")
+origin_wildcards = [
+    re.escape(o).replace(r"\*", r"[^.]+") for o in origins if o not in origins_exact
+]
+origin_regex = "|".join(origin_wildcards) or None
+
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
+    CachedCORSMiddleware,
+    allow_origins=list(origins_exact),
+    allow_origin_regex=origin_regex,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=[
@@ -72,8 +108,14 @@ app.add_middleware(
         "Origin",
         "X-Requested-With",
     ],
+    # Lets the browser read the GET /jobs pagination Cursor
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Health probes are answered before CORS / rate limiting (added last = outermost).
+# The /health route below still exists for the OpenAPI Docs.
+app.add_middleware(HealthCheckMiddleware)
+
 # Include Routers
 app.include_router(upload.router, tags=["Upload"])
 app.include_router(analyze.router, tags=["Analysis"])
@@ -84,8 +126,10 @@ app.include_router(preview.router)
 app.include_router(advanced.router, tags=["Advanced Features"])
 
 
+# Routes are annotated (or have a response_model) so FastAPI serializes them
+# straight to JSON bytes via pydantic-core instead of dict -> json.dumps()
 @app.get("/")
-async def root():
+async def root() -> dict[str, str | int]:
     """Health check and info Endpoint."""
     return {
         "name": "SLMGEN API",
@@ -96,6 +140,36 @@ async def root():
 
 
 @app.get("/health")
-async def health_check():
+async def health_check() -> dict[str, str]:
     """Simple health Check."""
     return {"status": "healthy"}
+
+
+if __name__ == "__main__":
+    # `python -m app.main` - same app, but picks the fast loop/parser explicitly.
+    # uvloop (libuv) and httptools (llhttp) ship with uvicorn[standard]; on
+    # Windows or slim installs we fall back to asyncio + h11.
+    import uvicorn
+
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+
+    # One worker on purpose: sessions live in process memory, so extra
+    # workers would each see a different set of Sessions.
+    uvicorn.run(
+        "app.main:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "8000")),
+        loop=loop,
+        http=http,
+        workers=1,
+    )
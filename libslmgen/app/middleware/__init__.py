@@ -14,6 +14,7 @@ from .auth import (
     require_role,
     verify_jwt,
 )
+from .timer_wheel import TimerWheel
 
 __all__ = [
     "AuthenticatedUser",
@@ -22,4 +23,5 @@ __all__ = [
     "get_optional_user",
     "require_role",
     "verify_jwt",
+    "TimerWheel",
 ]
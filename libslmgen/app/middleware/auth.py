@@ -21,15 +21,24 @@ Contributor: Vedant Singh Rajput <teleported0722@gmail.com>
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import asyncio
 import logging
-from typing import Optional
+import threading
+import time
+from typing import Annotated, Any, Optional
 from dataclasses import dataclass
 
+import httpx
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+import jwt
 from cachetools import TTLCache
 
+from app.config import settings
+from app.http_client import get_fallback_client, get_http_client
+from app.supabase import get_supabase_url, get_jwt_secret
+from app.tokens import token_key
+
 logger = logging.getLogger(__name__)
 
 # Security scheme for Swagger UI
@@ -39,31 +48,104 @@ security = HTTPBearer(auto_error=False)
 # Cache JWKS for 15 minutes to avoid hitting Supabase on every request.
 # This is important because JWKS fetching involves a network call, and we don't
 # want to do that on every single API request!
+# We cache the *constructed* key objects (keyed by kid) rather than the raw JSON,
+# so the per-request work is a dict lookup instead of re-parsing the EC key.
 _jwks_cache: TTLCache = TTLCache(maxsize=1, ttl=900)
 
+# Verified JWT payloads, keyed by a digest of the token (never the raw token).
+# Values are (payload, exp); the TTL bounds staleness and the exp check keeps
+# us from serving a token past its own expiry. Size/TTL are tunable via
+# JWT_CACHE_SIZE / JWT_CACHE_TTL.
+_payload_cache: TTLCache = TTLCache(
+    maxsize=settings.jwt_cache_size,
+    ttl=settings.jwt_cache_ttl,
+)
+
+# TTLCache isn't thread-safe, and sync routes run their deps in the Threadpool
+_payload_lock = threading.Lock()
+
+# Only one coroutine refetches on a cache miss; the rest wait and reuse it
+_jwks_lock = asyncio.Lock()
+
+# An unknown kid forces a refetch (Supabase rotated its keys), but at most
+# once per this many seconds - otherwise junk tokens could hammer Supabase.
+_JWKS_MIN_REFRESH = 60.0
+_jwks_fetched_at = 0.0
 
-def _get_jwks_cached(supabase_url: str) -> dict:
-    """Fetch JWKS from Supabase with caching."""
-    import requests
+# The lifespan task refetches JWKS this often - well inside the 15 minute
+# TTL, so the cached keys never lapse and no request waits on Supabase
+JWKS_REFRESH_INTERVAL = 600.0
+
+
+async def _get_jwks_cached(
+    supabase_url: str,
+    http_client: httpx.AsyncClient,
+    force_refresh: bool = False,
+) -> dict[str, Any]:
+    """
+    Fetch JWKS from Supabase and return verification keys by kid (cached).
+    
+    The fetch is async (on the shared app client) - a blocking fetch here
+    would stall every in-flight request until Supabase answers.
+    force_refresh bypasses the cache for key rotation, throttled by
+    _JWKS_MIN_REFRESH.
+    """
+    global _jwks_fetched_at
     
     cache_key = "jwks"
-    if cache_key in _jwks_cache:
+    if not force_refresh and cache_key in _jwks_cache:
         return _jwks_cache[cache_key]
     
-    jwks_url = f"{supabase_url}/auth/v1/.well-known/jwks.json"
-    try:
-        resp = requests.get(jwks_url, timeout=5)
-        resp.raise_for_status()
-        jwks = resp.json()
-        _jwks_cache[cache_key] = jwks
-        logger.info("JWKS fetched and cached")
-        return jwks
-    except Exception as e:
-        logger.error(f"Failed to fetch JWKS: {e}")
-        raise HTTPException(status_code=500, detail="Failed to fetch signing keys")
-
-
-@dataclass
+    async with _jwks_lock:
+        # Another request may have (re)populated the cache while we waited
+        cached = _jwks_cache.get(cache_key)
+        if cached is not None and (
+            not force_refresh
+            or time.monotonic() - _jwks_fetched_at < _JWKS_MIN_REFRESH
+        ):
+            return cached
+        
+        jwks_url = f"{supabase_url}/auth/v1/.well-known/jwks.json"
+        try:
+            resp = await http_client.get(jwks_url)
+            resp.raise_for_status()
+            jwks = resp.json()
+            # PyJWKSet builds cryptography (OpenSSL) key objects for every
+            # usable key and skips the rest, so verification runs in native
+            # code instead of pure-Python ECDSA
+            jwk_set = jwt.PyJWKSet.from_dict(jwks)
+            keys_by_kid = {
+                key.key_id: key.key
+                for key in jwk_set.keys
+                if key.key_id
+            }
+            _jwks_cache[cache_key] = keys_by_kid
+            _jwks_fetched_at = time.monotonic()
+            logger.info(f"JWKS fetched and cached ({len(keys_by_kid)} keys)")
+            return keys_by_kid
+        except Exception as e:
+            logger.error(f"Failed to fetch JWKS: {e}")
+            raise HTTPException(status_code=500, detail="Failed to fetch signing keys")
+
+
+async def run_jwks_refresh(http_client: httpx.AsyncClient) -> None:
+    """
+    Keep the JWKS cache warm in the Background.
+
+    Fetches once at startup and then every JWKS_REFRESH_INTERVAL, so the
+    lazy fetch in _get_jwks_cached only ever runs if this one Fails. A
+    failed refresh just logs - the previous keys stay cached until their TTL.
+    """
+    supabase_url = get_supabase_url()
+    while True:
+        try:
+            await _get_jwks_cached(supabase_url, http_client, force_refresh=True)
+        except HTTPException:
+            pass  # already logged by _get_jwks_cached
+        await asyncio.sleep(JWKS_REFRESH_INTERVAL)
+
+
+@dataclass(slots=True, frozen=True)
 class AuthenticatedUser:
     """
     Represents a logged-in user from Supabase.
@@ -80,7 +162,7 @@ class AuthenticatedUser:
         return True
 
 
-@dataclass  
+@dataclass(slots=True, frozen=True)
 class AnonymousUser:
     """
     Represents someone who isn't logged in.
@@ -97,7 +179,7 @@ class AnonymousUser:
         return False
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LocalDevUser:
     """
     A mock user for local development when auth is disabled.
@@ -118,24 +200,18 @@ class LocalDevUser:
         return True
 
 
-def verify_jwt(token: str) -> dict:
-    """
-    Verify and decode a Supabase JWT token.
-    
-    Supabase uses ES256 (ECDSA) for JWT signing. We fetch the public keys
-    from their JWKS endpoint to verify tokens (with caching).
-    
-    Args:
-        token: JWT access token
-        
-    Returns:
-        Decoded token payload
-        
-    Raises:
-        HTTPException: If token is invalid
-    """
-    from jose import jwk
-    
+# Neither of these carries per-request state, so everyone shares one Instance
+_ANON = AnonymousUser()
+_LOCAL_DEV = LocalDevUser()
+
+# Settings are frozen, so whether auth is off can't change after Startup
+_AUTH_DISABLED: bool = settings.auth_disabled
+if _AUTH_DISABLED:
+    logger.warning("AUTH_DISABLED=true - every request runs as LocalDevUser")
+
+
+async def _decode_jwt(token: str, http_client: httpx.AsyncClient) -> dict:
+    """Verify a token's signature and claims (no payload caching)."""
     try:
         # Get the unverified header to find the key ID
         unverified_header = jwt.get_unverified_header(token)
@@ -146,23 +222,22 @@ def verify_jwt(token: str) -> dict:
         
         # For ES256 tokens, fetch JWKS from Supabase (cached)
         if token_alg == "ES256":
-            from app.supabase import get_supabase_url
-            jwks = _get_jwks_cached(get_supabase_url())
+            keys_by_kid = await _get_jwks_cached(get_supabase_url(), http_client)
             
-            # Find the key matching the kid
-            ec_key = None
-            for key in jwks.get("keys", []):
-                if key.get("kid") == kid:
-                    ec_key = key
-                    break
-            
-            if not ec_key:
+            # Keys are pre-constructed at fetch time, so this is just a lookup
+            public_key = keys_by_kid.get(kid)
+            if public_key is None:
+                # Maybe the keys were rotated since we cached them - refetch once
+                keys_by_kid = await _get_jwks_cached(
+                    get_supabase_url(), http_client, force_refresh=True
+                )
+                public_key = keys_by_kid.get(kid)
+            if public_key is None:
                 logger.warning(f"No matching key found for kid: {kid}")
                 raise HTTPException(status_code=401, detail="Invalid token signing key")
             
-            # Convert JWK to PEM format for jose
-            public_key = jwk.construct(ec_key)
-            
+            # PyJWT verifies in OpenSSL (well under a millisecond), so this
+            # runs inline - only the JWKS fetch above ever needs to Await
             payload = jwt.decode(
                 token,
                 public_key,
@@ -173,7 +248,6 @@ def verify_jwt(token: str) -> dict:
         
         # Fallback to HS256 for older tokens
         else:
-            from app.supabase import get_jwt_secret
             payload = jwt.decode(
                 token,
                 get_jwt_secret(),
@@ -182,7 +256,7 @@ def verify_jwt(token: str) -> dict:
             )
             return payload
             
-    except JWTError as e:
+    except jwt.InvalidTokenError as e:
         logger.warning(f"JWT verification failed: {e}")
         raise HTTPException(
             status_code=401,
@@ -191,8 +265,51 @@ def verify_jwt(token: str) -> dict:
         )
 
 
+async def verify_jwt(token: str, http_client: httpx.AsyncClient | None = None) -> dict:
+    """
+    Verify and decode a Supabase JWT token.
+    
+    Supabase uses ES256 (ECDSA) for JWT signing. We fetch the public keys
+    from their JWKS endpoint to verify tokens (with caching).
+    
+    A browser session sends the same access token on every request, so
+    verified payloads are cached briefly by token digest. Entries are never
+    served past the token's own exp claim.
+    
+    Args:
+        token: JWT access token
+        http_client: Client for JWKS fetches (defaults to a shared fallback)
+        
+    Returns:
+        Decoded token payload
+        
+    Raises:
+        HTTPException: If token is invalid
+    """
+    cache_key = token_key(token)
+    
+    with _payload_lock:
+        cached = _payload_cache.get(cache_key)
+        if cached is not None:
+            payload, exp = cached
+            if exp > time.time():
+                return payload
+            _payload_cache.pop(cache_key, None)
+    
+    payload = await _decode_jwt(token, http_client or get_fallback_client())
+    
+    # Only cache tokens that carry an expiry we can enforce ourselves
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        with _payload_lock:
+            _payload_cache[cache_key] = (payload, exp)
+    
+    return payload
+
+
 async def get_current_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+    http_client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
 ) -> AuthenticatedUser | LocalDevUser:
     """
     Dependency to extract and verify the current user.
@@ -211,6 +328,7 @@ async def get_current_user(
     
     Args:
         credentials: Bearer token from Authorization header
+        http_client: Shared app HTTP client (for JWKS fetches)
         
     Returns:
         AuthenticatedUser with user details, or LocalDevUser in dev mode
@@ -219,10 +337,8 @@ async def get_current_user(
         HTTPException: If no token or invalid token (only when auth is enabled)
     """
     # Check if we're in local dev mode - if so, skip all the JWT stuff!
-    from app.config import settings
-    if settings.auth_disabled:
-        logger.debug("Auth disabled - returning LocalDevUser")
-        return LocalDevUser()
+    if _AUTH_DISABLED:
+        return _LOCAL_DEV
     
     # Normal auth flow: require a valid token
     if credentials is None:
@@ -232,7 +348,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    payload = verify_jwt(credentials.credentials)
+    payload = await verify_jwt(credentials.credentials, http_client)
     
     return AuthenticatedUser(
         id=payload["sub"],
@@ -242,7 +358,8 @@ async def get_current_user(
 
 
 async def get_optional_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+    http_client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
 ) -> AuthenticatedUser | AnonymousUser | LocalDevUser:
     """
     Dependency to optionally extract the current user.
@@ -267,23 +384,22 @@ async def get_optional_user(
     
     Args:
         credentials: Optional Bearer token
+        http_client: Shared app HTTP client (for JWKS fetches)
         
     Returns:
         AuthenticatedUser if valid token, AnonymousUser otherwise, LocalDevUser in dev mode
     """
     # Check if we're in local dev mode
-    from app.config import settings
-    if settings.auth_disabled:
-        logger.debug("Auth disabled - returning LocalDevUser")
-        return LocalDevUser()
+    if _AUTH_DISABLED:
+        return _LOCAL_DEV
     
     # No token? That's fine for optional auth routes
     if credentials is None:
-        return AnonymousUser()
+        return _ANON
     
     # Try to verify the token - if it fails, treat as anonymous
     try:
-        payload = verify_jwt(credentials.credentials)
+        payload = await verify_jwt(credentials.credentials, http_client)
         return AuthenticatedUser(
             id=payload["sub"],
             email=payload.get("email"),
@@ -291,7 +407,7 @@ async def get_optional_user(
         )
     except HTTPException:
         # Token was provided but invalid - treat as anonymous rather than erroring
-        return AnonymousUser()
+        return _ANON
 
 
 def require_role(required_role: str):
@@ -303,8 +419,11 @@ def require_role(required_role: str):
         async def admin_only(user: AuthenticatedUser = Depends(require_role("admin"))):
             ...
     """
+    # Built once per route, not per Request
+    allowed = frozenset({required_role, "service_role"})
+    
     async def role_checker(user: AuthenticatedUser = Depends(get_current_user)):
-        if user.role != required_role and user.role != "service_role":
+        if user.role not in allowed:
             raise HTTPException(
                 status_code=403,
                 detail=f"Role '{required_role}' required"
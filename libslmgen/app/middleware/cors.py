@@ -0,0 +1,41 @@
+"""
+CORS Middleware.
+
+Thin wrapper over Starlette's CORSMiddleware with frozen lookups.
+"""
+# Author: Eshan Roy <eshanized@proton.me>
+# License: MIT License
+# Copyright (c) 2026 Eshan Roy
+
+from collections.abc import Collection
+
+from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp
+
+
+class CachedCORSMiddleware(CORSMiddleware):
+    """
+    CORSMiddleware with everything frozen at Startup.
+
+    Starlette already pre-joins the preflight header values, but it keeps
+    origins, methods and headers as lists - so every cross-origin request
+    pays for a linear scan. We swap them for frozensets once and keep the
+    hot path to plain set Lookups.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Collection[str] = (),
+        **kwargs,
+    ) -> None:
+        # Normalize origins - trailing slashes and blanks sneak in from env Vars
+        origins = tuple(
+            o.strip().rstrip("/") for o in allow_origins if o.strip()
+        )
+        super().__init__(app, allow_origins=origins, **kwargs)
+
+        self.allow_origins = frozenset(origins)
+        self.allow_methods = frozenset(self.allow_methods)
+        self.allow_headers = frozenset(self.allow_headers)
+
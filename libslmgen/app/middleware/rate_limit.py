@@ -4,56 +4,191 @@
 Rate Limiting Middleware.
 
 Protects API endpoints from abuse with configurable rate limits.
-Uses slowapi for in-memory rate limiting.
+Uses an in-memory token bucket per client - O(1) per request, and it
+tolerates short bursts the way real users actually click around.
 """
 # Author: Eshan Roy <eshanized@proton.me>
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-from starlette.requests import Request
+import asyncio
+import logging
+import math
+import threading
+import time
+import zlib
+
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.config import settings
+from app.middleware.timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# How often the lifespan task ticks the eviction wheel (seconds)
+EVICTION_INTERVAL = 1.0
+
+# Bucket tables are split into shards, each with its own lock (power of Two)
+N_SHARDS = 16
 
+# Paths that never count against a Bucket
+EXEMPT_PATHS = frozenset({"/health"})
 
-def get_real_client_ip(request: Request) -> str:
+
+def client_ip_from_scope(scope: Scope) -> str:
     """
-    Get the real client IP, handling reverse proxies.
-    
+    Get the real client IP straight from the ASGI Scope.
+
     Checks X-Forwarded-For header for proxied requests,
-    falls back to direct connection IP.
+    falls back to direct connection IP. Works on the raw header list so
+    the middleware doesn't need to build a Request just to read one Header.
     """
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        # Take the first IP in the chain (original client)
-        return forwarded.split(",")[0].strip()
-    return get_remote_address(request)
+    for name, value in scope["headers"]:
+        if name == b"x-forwarded-for":
+            if value:
+                # Take the first IP in the chain (original client) - find +
+                # slice instead of split() so a long chain isn't turned into a List
+                forwarded = value.decode("latin-1")
+                i = forwarded.find(",")
+                return (forwarded[:i] if i >= 0 else forwarded).strip()
+            break
+
+    client = scope.get("client")
+    if client and client[0]:
+        return client[0]
+    return "127.0.0.1"
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by client.
+
+    Each client starts with a full bucket of `per_minute` tokens, which
+    refills continuously at per_minute/60 tokens per second. A request
+    costs one token; an empty bucket means 429.
+
+    Keys are spread over N_SHARDS dicts by crc32, so concurrent callers
+    only contend when they land on the same Shard.
+
+    Idle buckets are expired through a TimerWheel: each key is queued
+    once when its bucket is created, and re-queued at expiry time if it
+    was touched in the meantime - so eviction never scans the whole Table.
+    """
+
+    def __init__(self, per_minute: int):
+        if per_minute <= 0:
+            raise ValueError(f"per_minute must be positive, got {per_minute}")
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.seconds_per_token = 60.0 / per_minute
+        # Buckets idle for this long are full again, so we can forget Them
+        self.idle_ttl = self.capacity / self.rate * 2
+        self._shards: list[dict[str, tuple[float, float]]] = [{} for _ in range(N_SHARDS)]
+        self._locks = [threading.Lock() for _ in range(N_SHARDS)]
+        self._wheel = TimerWheel(resolution_s=EVICTION_INTERVAL)
 
+    def hit(self, key: str) -> float:
+        """
+        Take a token for this key.
 
-# Create limiter instance
-limiter = Limiter(key_func=get_real_client_ip)
+        Returns 0 if the request is allowed, otherwise the number of
+        seconds until a token will be Available.
+        """
+        # crc32 is stable across processes, unlike the randomized hash()
+        idx = zlib.crc32(key.encode()) & (N_SHARDS - 1)
+        buckets = self._shards[idx]
 
+        with self._locks[idx]:
+            now = time.monotonic()
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = (self.capacity, now)
+                self._wheel.schedule(key, now + self.idle_ttl)
+            tokens, last = bucket
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
 
-def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
-    """Custom handler for rate limit exceeded errors."""
+            if tokens >= 1:
+                buckets[key] = (tokens - 1, now)
+                return 0.0
+
+            buckets[key] = (tokens, now)
+            return (1 - tokens) * self.seconds_per_token
+
+    def evict_idle(self) -> int:
+        """Drop buckets that haven't been touched in idle_ttl Seconds."""
+        now = time.monotonic()
+        evicted = 0
+        for key in self._wheel.advance(now):
+            idx = zlib.crc32(key.encode()) & (N_SHARDS - 1)
+            with self._locks[idx]:
+                bucket = self._shards[idx].get(key)
+                if bucket is None:
+                    continue
+                deadline = bucket[1] + self.idle_ttl
+                if deadline <= now:
+                    del self._shards[idx][key]
+                    evicted += 1
+                else:
+                    # Used since it was queued - push it back to its new Deadline
+                    self._wheel.schedule(key, deadline)
+        return evicted
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets in self._shards)
+
+
+# One bucket table for general traffic, a stricter one for Uploads
+general_limiter = TokenBucketLimiter(settings.rate_limit_per_minute)
+upload_limiter = TokenBucketLimiter(settings.upload_rate_limit_per_minute)
+
+# Paths with their own table - everything else shares general_limiter
+_PATH_LIMITERS: dict[str, TokenBucketLimiter] = {"/upload": upload_limiter}
+
+
+def rate_limit_exceeded_response(retry_after: float) -> JSONResponse:
+    """Build the 429 response for an empty Bucket."""
+    seconds = max(1, math.ceil(retry_after))
     return JSONResponse(
         status_code=429,
         content={
             "detail": "Rate limit exceeded. Try again in a few seconds.",
-            "retry_after": exc.detail,
-        }
+            "retry_after": seconds,
+        },
+        headers={"Retry-After": str(seconds)},
     )
 
 
-# Rate limit decorators for different endpoint types
-def general_limit():
-    """Standard rate limit for most endpoints."""
-    return limiter.limit(f"{settings.rate_limit_per_minute}/minute")
+class TokenBucketMiddleware:
+    """
+    ASGI middleware that charges every HTTP request against a token bucket.
+
+    Keyed by client IP - auth runs later as a route dependency, so the
+    user id isn't known yet at this point.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        key = client_ip_from_scope(scope)
+        retry_after = _PATH_LIMITERS.get(scope["path"], general_limiter).hit(key)
+        if retry_after:
+            response = rate_limit_exceeded_response(retry_after)
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
 
 
-def upload_limit():
-    """Stricter rate limit for upload endpoints."""
-    return limiter.limit(f"{settings.upload_rate_limit_per_minute}/minute")
+async def run_bucket_eviction() -> None:
+    """Periodically drop idle buckets so memory tracks active Clients."""
+    while True:
+        await asyncio.sleep(EVICTION_INTERVAL)
+        evicted = general_limiter.evict_idle() + upload_limiter.evict_idle()
+        if evicted:
+            logger.debug(f"Evicted {evicted} idle rate-limit buckets")
@@ -0,0 +1,85 @@
+"""
+Timer Wheel.
+
+A hashed timer wheel for expiring keys in O(1) - the same trick Caffeine
+uses. Instead of scanning every entry to find the stale ones, each key
+sits in the slot for its deadline and we only ever look at the slot(s)
+the clock has just passed.
+"""
+# Author: Eshan Roy <eshanized@proton.me>
+# License: MIT License
+# Copyright (c) 2026 Eshan Roy
+
+import threading
+import time
+from collections.abc import Hashable
+
+
+class TimerWheel:
+    """
+    Circular array of slots, each holding (key, deadline) Pairs.
+
+    Deadlines are time.monotonic() values. A deadline further out than one
+    full rotation simply gets re-queued when its slot comes round early.
+
+    Usage:
+        wheel = TimerWheel()
+        wheel.schedule("client-1", time.monotonic() + 120)
+        ...
+        for key in wheel.advance():
+            evict(key)
+    """
+
+    def __init__(self, n_slots: int = 512, resolution_s: float = 1.0):
+        self.n_slots = n_slots
+        self.resolution_s = resolution_s
+        self._slots: list[list[tuple[Hashable, float]]] = [[] for _ in range(n_slots)]
+        # Last tick we've already expired - scheduling never lands behind it
+        self._tick = int(time.monotonic() // resolution_s)
+        self._lock = threading.Lock()
+
+    def _place(self, key: Hashable, deadline: float) -> None:
+        """Drop an entry into its slot (caller holds the Lock)."""
+        tick = max(int(deadline // self.resolution_s), self._tick + 1)
+        self._slots[tick % self.n_slots].append((key, deadline))
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Queue a key to come due at deadline (monotonic Seconds)."""
+        with self._lock:
+            self._place(key, deadline)
+
+    def advance(self, now: float | None = None) -> list[Hashable]:
+        """
+        Move the wheel up to now and return the keys that came Due.
+
+        Only the slots between the last tick and now are touched, so the
+        cost is independent of how many keys are Scheduled.
+        """
+        if now is None:
+            now = time.monotonic()
+        target = int(now // self.resolution_s)
+
+        due: list[Hashable] = []
+        with self._lock:
+            # After a long stall one full rotation covers every Slot
+            steps = min(target - self._tick, self.n_slots)
+            start = target - steps
+            self._tick = target
+
+            for tick in range(start + 1, target + 1):
+                idx = tick % self.n_slots
+                slot = self._slots[idx]
+                if not slot:
+                    continue
+                self._slots[idx] = []
+                for key, deadline in slot:
+                    if deadline <= now:
+                        due.append(key)
+                    else:
+                        # Not due yet (further than one rotation out)
+                        self._place(key, deadline)
+        return due
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(slot) for slot in self._slots)
@@ -11,7 +11,7 @@ Defines all the data structures used across the API.
 
 from enum import Enum
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TaskType(str, Enum):
@@ -33,8 +33,16 @@ class DeploymentTarget(str, Enum):
     SERVER = "server"
 
 
+# Results are built once and then only read and serialized - freezing them
+# means a cached instance (e.g. from ingest_data_cached) can't be changed
+# under another Request. Request models are left as they are.
+_FROZEN = ConfigDict(frozen=True)
+
+
 class DatasetStats(BaseModel):
     """Statistics about the uploaded Dataset."""
+    model_config = _FROZEN
+    
     total_examples: int = Field(..., description="Number of conversation Examples")
     total_tokens: int = Field(..., description="Rough token Count estimate")
     avg_tokens_per_example: int = Field(..., description="Average tokens per Example")
@@ -47,6 +55,8 @@ class DatasetStats(BaseModel):
 
 class DatasetCharacteristics(BaseModel):
     """Detailed characteristics for model Selection."""
+    model_config = _FROZEN
+    
     is_multilingual: bool = False
     avg_response_length: int = 0
     looks_like_json: bool = False
@@ -57,6 +67,8 @@ class DatasetCharacteristics(BaseModel):
 
 class ModelRecommendation(BaseModel):
     """A single model Recommendation."""
+    model_config = _FROZEN
+    
     model_id: str = Field(..., description="HuggingFace model ID")
     model_name: str = Field(..., description="Human-readable Name")
     size: str = Field(..., description="Model size like 2B, 3B, 7B")
@@ -68,12 +80,16 @@ class ModelRecommendation(BaseModel):
 
 class RecommendationResponse(BaseModel):
     """Full recommendation response with Primary and alternatives."""
+    model_config = _FROZEN
+    
     primary: ModelRecommendation
     alternatives: list[ModelRecommendation] = Field(default_factory=list)
 
 
 class UploadResponse(BaseModel):
     """Response after uploading a Dataset."""
+    model_config = _FROZEN
+    
     session_id: str
     stats: DatasetStats
     message: str = "Dataset uploaded successfully!"
@@ -86,6 +102,8 @@ class AnalyzeRequest(BaseModel):
 
 class AnalyzeResponse(BaseModel):
     """Detailed analysis of the Dataset."""
+    model_config = _FROZEN
+    
     session_id: str
     stats: DatasetStats
     characteristics: DatasetCharacteristics
@@ -106,6 +124,8 @@ class GenerateRequest(BaseModel):
 
 class NotebookResponse(BaseModel):
     """Response after generating a Notebook."""
+    model_config = _FROZEN
+    
     session_id: str
     notebook_filename: str
     download_url: str
@@ -10,15 +10,16 @@ These are additive to the core upload → analyze → recommend → generate flo
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from app.session import session_manager
+from app.session import session_manager, load_examples
 from core import (
     detect_personality,
     estimate_hallucination_risk,
-    calculate_confidence,
+    calculate_confidence_cached,
     compose_behavior,
     BehaviorConfig,
     lint_prompt,
@@ -26,7 +27,7 @@ from core import (
     generate_model_card,
     compare_prompts,
 )
-from core.recommender import MODELS
+from core.recommender import MODELS, MODELS_BY_ID
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -142,10 +143,11 @@ class ModelDeepDiveResponse(BaseModel):
 async def get_personality(session_id: str):
     """Get dataset personality analysis."""
     session = session_manager.get(session_id)
-    if not session or not session.raw_data:
+    data = await load_examples(session) if session else []
+    if not data:
         raise HTTPException(status_code=404, detail="Session not found or no data")
     
-    personality = detect_personality(session.raw_data)
+    personality = detect_personality(data)
     
     return PersonalityResponse(
         tone=personality.tone,
@@ -161,10 +163,11 @@ async def get_personality(session_id: str):
 async def get_risk(session_id: str):
     """Get hallucination risk estimate."""
     session = session_manager.get(session_id)
-    if not session or not session.raw_data:
+    data = await load_examples(session) if session else []
+    if not data:
         raise HTTPException(status_code=404, detail="Session not found or no data")
     
-    risk = estimate_hallucination_risk(session.raw_data)
+    risk = estimate_hallucination_risk(data)
     
     return RiskResponse(
         score=risk.score,
@@ -178,10 +181,13 @@ async def get_risk(session_id: str):
 async def get_confidence(session_id: str):
     """Get dataset confidence score."""
     session = session_manager.get(session_id)
-    if not session or not session.raw_data:
+    if not session or not session.file_path:
         raise HTTPException(status_code=404, detail="Session not found or no data")
     
-    conf = calculate_confidence(session.raw_data)
+    # Scored once per upload, in a thread - it's a few passes over every Example
+    conf, error = await asyncio.to_thread(calculate_confidence_cached, session.file_path)
+    if error:
+        raise HTTPException(status_code=404, detail="Session not found or no data")
     
     return ConfidenceResponse(
         score=conf.score,
@@ -236,10 +242,11 @@ async def lint_prompt_endpoint(request: LintRequest):
 async def get_failure_preview(session_id: str):
     """Get synthetic failure cases for the dataset."""
     session = session_manager.get(session_id)
-    if not session or not session.raw_data:
+    data = await load_examples(session) if session else []
+    if not data:
         raise HTTPException(status_code=404, detail="Session not found or no data")
     
-    cases = generate_failure_previews(session.raw_data)
+    cases = generate_failure_previews(data)
     
     return [
         FailureCase(
@@ -300,21 +307,17 @@ async def get_model_card(session_id: str):
         raise HTTPException(status_code=404, detail="Session not found or incomplete")
     
     model_id = session.selected_model_id or "unknown"
-    model_name = "Custom Model"
-    
-    # Find model name
-    for key, spec in MODELS.items():
-        if spec.model_id == model_id:
-            model_name = spec.name
-            break
+    spec = MODELS_BY_ID.get(model_id)
+    model_name = spec.name if spec else "Custom Model"
     
     task = session.task_type.value if session.task_type else "general"
     
     # Get personality if available
     personality_summary = None
-    if session.raw_data:
+    data = await load_examples(session)
+    if data:
         try:
-            personality = detect_personality(session.raw_data)
+            personality = detect_personality(data)
             personality_summary = personality.summary
         except Exception:
             pass
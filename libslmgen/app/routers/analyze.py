@@ -9,13 +9,14 @@ Returns detailed dataset characteristics for model selection.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException, Depends
 
 from app.session import session_manager
 from app.models import AnalyzeRequest, AnalyzeResponse
 from app.middleware.auth import get_optional_user, AuthenticatedUser, AnonymousUser
-from core import analyze_dataset, ingest_data
+from core import analyze_dataset_cached
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -51,29 +52,26 @@ async def analyze_session(
     
     # If we already have characteristics cached, return Them
     if session.characteristics is not None:
+        logger.debug(f"Characteristics cache hit for session {session.id}")
         return AnalyzeResponse(
             session_id=session.id,
             stats=session.stats,
             characteristics=session.characteristics,
         )
     
-    # Need to reload data if it was Cleared
-    data = session.raw_data
-    if not data and session.file_path:
-        # Reload from File
-        data, _, error = ingest_data(session.file_path)
+    # Run Analysis - memoized per file, off the event Loop
+    if session.file_path:
+        characteristics, error = await asyncio.to_thread(
+            analyze_dataset_cached, session.file_path
+        )
         if error:
             raise HTTPException(status_code=500, detail=f"Failed to reload data: {error}")
-    
-    if not data:
+    else:
         raise HTTPException(
             status_code=400,
             detail="No data available for analysis."
         )
     
-    # Run Analysis
-    characteristics = analyze_dataset(data)
-    
     # Cache it in Session
     session.characteristics = characteristics
     session_manager.update(session)
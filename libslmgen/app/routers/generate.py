@@ -11,8 +11,14 @@ Creates the Colab notebook and handles downloads.
 
 import asyncio
 import logging
+import mmap
+import os
+import secrets
+from contextlib import suppress
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, Depends, Query
+
+import aiofiles
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from fastapi.responses import FileResponse
 
 from app.config import settings
@@ -20,8 +26,8 @@ from app.session import session_manager
 from app.models import GenerateRequest, NotebookResponse
 from app.gist import create_gist
 from app.middleware.auth import get_optional_user, AuthenticatedUser, AnonymousUser
-from core import generate_notebook
-from core.recommender import MODELS
+from core import generate_notebook_parts
+from core.recommender import MODELS_BY_ID
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -29,26 +35,74 @@ router = APIRouter()
 # Notebook generation timeout (60 seconds)
 GENERATION_TIMEOUT_SECONDS = 60
 
+# Below this the notebook is built in well under a millisecond (cached
+# skeleton + base64), cheaper than a threadpool round trip - so do it Inline
+INLINE_GENERATION_MAX_BYTES = 256 * 1024
+
+_VALID_IDS: tuple[str, ...] = tuple(MODELS_BY_ID)
+
+# Download links carry a per-notebook token, so a cached copy can never be
+# for a different notebook - let the browser keep it for a few Minutes
+DOWNLOAD_CACHE_CONTROL = "private, max-age=300"
 
-def _get_model_info(model_id: str) -> tuple[str, str, bool]:
+
+def _notebook_parts_from_file(file_path: str, **notebook_kwargs) -> tuple[str, str, str]:
+    """
+    Build the notebook straight off an mmap of the dataset File.
+
+    base64 reads the page cache directly, so a large dataset never gets
+    copied into a Python bytes object first. Runs in a worker Thread.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap can't map an empty File
+            return generate_notebook_parts(dataset_jsonl=b"", **notebook_kwargs)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return generate_notebook_parts(dataset_jsonl=view, **notebook_kwargs)
+
+
+def _replace_notebook(tmp_path: Path, notebook_path: Path) -> os.stat_result:
+    """Stat a freshly written notebook and move it into place Atomically."""
+    st = os.stat(tmp_path)
+    # The stat stays valid across the rename - same inode, same size and Mtime
+    os.replace(tmp_path, notebook_path)
+    return st
+
+
+def _notebook_etag(st: os.stat_result) -> str:
+    """Weak ETag from the notebook's mtime + size - no need to hash the File."""
+    return f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check with weak comparison (W/ prefixes ignored)."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == bare
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _get_model_info(model_id: str) -> tuple[str, str, bool] | None:
     """
     Get model name, size, and gated status for notebook generation.
     
     Returns None if model_id is invalid.
     """
-    for key, spec in MODELS.items():
-        if spec.model_id == model_id:
-            return spec.name, spec.size, spec.is_gated
-    return None
+    spec = MODELS_BY_ID.get(model_id)
+    if spec is None:
+        return None
+    return spec.name, spec.size, spec.is_gated
 
 
 def _validate_model_id(model_id: str) -> None:
     """Validate that model_id exists in MODELS dict."""
-    valid_ids = [spec.model_id for spec in MODELS.values()]
-    if model_id not in valid_ids:
+    if model_id not in MODELS_BY_ID:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid model_id. Valid options: {valid_ids}"
+            detail=f"Invalid model_id. Valid options: {list(_VALID_IDS)}"
         )
 
 
@@ -99,33 +153,42 @@ async def generate_training_notebook(
         )
     model_name, model_size, is_gated = model_info
     
-    # Load the dataset Content
-    if not session.file_path or not Path(session.file_path).exists():
+    # Load the dataset Content - just try the open rather than exists() first,
+    # the file is there on every path except a disk cleanup
+    if not session.file_path:
         raise HTTPException(
             status_code=400,
             detail="Dataset file not found."
         )
     
-    with open(session.file_path, "r", encoding="utf-8") as f:
-        dataset_content = f.read()
-    
     # Get task type String
     task_type = session.task_type.value if session.task_type else "general"
     
-    # Generate the Notebook with timeout
+    notebook_kwargs = {
+        "model_id": model_id,
+        "model_name": model_name,
+        "model_size": model_size,
+        "task_type": task_type,
+        "num_examples": session.stats.total_examples,
+        "is_gated": is_gated,
+    }
+    
+    # Generate the Notebook - small datasets are read (off the loop) and built
+    # inline, big ones are mmapped and built in a thread with timeout
     try:
-        notebook_json = await asyncio.wait_for(
-            asyncio.to_thread(
-                generate_notebook,
-                dataset_jsonl=dataset_content,
-                model_id=model_id,
-                model_name=model_name,
-                model_size=model_size,
-                task_type=task_type,
-                num_examples=session.stats.total_examples,
-                is_gated=is_gated,
-            ),
-            timeout=GENERATION_TIMEOUT_SECONDS
+        if session.file_size <= INLINE_GENERATION_MAX_BYTES:
+            async with aiofiles.open(session.file_path, "rb") as f:
+                dataset_content = await f.read()
+            notebook_parts = generate_notebook_parts(dataset_jsonl=dataset_content, **notebook_kwargs)
+        else:
+            notebook_parts = await asyncio.wait_for(
+                asyncio.to_thread(_notebook_parts_from_file, session.file_path, **notebook_kwargs),
+                timeout=GENERATION_TIMEOUT_SECONDS
+            )
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=400,
+            detail="Dataset file not found."
         )
     except asyncio.TimeoutError:
         logger.error(f"Notebook generation timed out for session {request.session_id}")
@@ -141,10 +204,25 @@ async def generate_training_notebook(
     notebook_filename = f"finetune_{model_name.lower().replace(' ', '_')}_{request.session_id[:8]}.ipynb"
     notebook_path = Path(settings.upload_dir) / notebook_filename
     
-    with open(notebook_path, "w", encoding="utf-8") as f:
-        f.write(notebook_json)
+    # Write head / dataset / tail straight out rather than joining them into
+    # one more copy of the whole notebook first. It goes to a temp file and is
+    # swapped in whole, so a download running meanwhile never sees it half Written
+    tmp_path = notebook_path.with_name(f".{notebook_filename}.{secrets.token_hex(4)}.tmp")
+    try:
+        async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+            for part in notebook_parts:
+                await f.write(part)
+        notebook_stat = await asyncio.to_thread(_replace_notebook, tmp_path, notebook_path)
+    except OSError as e:
+        with suppress(OSError):
+            tmp_path.unlink()
+        logger.error(f"Failed to write notebook: {e}")
+        raise HTTPException(status_code=500, detail="Failed to save notebook.")
     
+    # No awaits from here to the new token - the new stat and the token that
+    # hands it out go live together, and the old token stops working
     session.notebook_path = str(notebook_path)
+    session.notebook_stat = notebook_stat
     session_manager.update(session)
     
     # Generate secure download token
@@ -160,7 +238,7 @@ async def generate_training_notebook(
     if settings.github_token:
         try:
             colab_url = await create_gist(
-                notebook_content=notebook_json,
+                notebook_content="".join(notebook_parts),
                 filename=notebook_filename,
                 description=f"SLMGEN Fine-tuning Notebook - {model_name}",
             )
@@ -181,6 +259,7 @@ async def generate_training_notebook(
 
 @router.get("/download/{session_id}")
 async def download_notebook(
+    request: Request,
     session_id: str,
     token: str = Query(..., description="Download token from generate-notebook response"),
     user: AuthenticatedUser | AnonymousUser = Depends(get_optional_user)
@@ -190,32 +269,64 @@ async def download_notebook(
     
     Requires valid download token from generate-notebook response.
     """
-    # Validate download token first
-    if not session_manager.validate_download_token(session_id, token):
-        raise HTTPException(
-            status_code=403,
-            detail="Invalid or expired download token. Please regenerate the notebook."
-        )
-    
     user_id = user.id if user.is_authenticated else None
-    session = session_manager.get_with_owner(session_id, user_id)
+    
+    # Repeat downloads of the same link skip the full validation Path
+    session = session_manager.get_cached_download(session_id, token, user_id)
     
     if session is None:
+        # Validate download token first
+        if not session_manager.validate_download_token(session_id, token):
+            raise HTTPException(
+                status_code=403,
+                detail="Invalid or expired download token. Please regenerate the notebook."
+            )
+        
+        session = session_manager.get_with_owner(session_id, user_id)
+        
+        if session is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Session not found, expired, or access denied."
+            )
+        
+        session_manager.cache_download(session, token)
+    
+    if not session.notebook_path or session.notebook_stat is None:
         raise HTTPException(
             status_code=404,
-            detail="Session not found, expired, or access denied."
+            detail="Notebook not generated yet."
         )
     
-    if not session.notebook_path or not Path(session.notebook_path).exists():
+    # Client already has this exact notebook (e.g. Colab re-opening the link)
+    etag = _notebook_etag(session.notebook_stat)
+    headers = {"ETag": etag, "Cache-Control": DOWNLOAD_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    # Sending the file needs it to still be there - check before any headers
+    # go out, since FileResponse only finds out mid-response. A file cleaned
+    # up behind the session's back is a plain 404, and the flag is Cleared
+    try:
+        st = await asyncio.to_thread(os.stat, session.notebook_path)
+    except FileNotFoundError:
+        session.notebook_stat = None
+        session_manager.update(session)
         raise HTTPException(
             status_code=404,
             detail="Notebook not generated yet."
         )
+    headers["ETag"] = _notebook_etag(st)
     
     filename = Path(session.notebook_path).name
     
+    # Hand Starlette the stat we just took - it skips its own os.stat and
+    # goes straight to streaming (or pathsend if the server has it)
     return FileResponse(
         path=session.notebook_path,
         filename=filename,
         media_type="application/x-ipynb+json",
+        stat_result=st,
+        headers=headers,
     )
@@ -17,16 +17,37 @@ Contributor: Vedant Singh Rajput <teleported0722@gmail.com>
 @copyright 2026 Eshan Roy
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import threading
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import Any, List, Optional
 from pydantic import BaseModel
-from datetime import datetime, timezone
+from datetime import datetime
+from cachetools import TTLCache
 
 from app.middleware.auth import get_current_user, AuthenticatedUser
-from app.supabase import get_supabase_client, is_supabase_configured
+from app.supabase import delete_from_storage, get_supabase_client, is_supabase_configured
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+# Short-lived cache of job reads, keyed by (user_id, route, params).
+# Dashboards poll these, and a 30s-old job list is fine - any write by
+# the same user drops their entries straight away.
+JOBS_CACHE_TTL = 30
+JOBS_CACHE_SIZE = 10_000
+_jobs_cache: TTLCache = TTLCache(maxsize=JOBS_CACHE_SIZE, ttl=JOBS_CACHE_TTL)
+_jobs_cache_lock = threading.Lock()
+
+# Header carrying the cursor for the next page of GET /jobs (the body stays
+# a plain list so existing clients keep working)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 # ============================================
 # HELPER FUNCTIONS
@@ -59,6 +80,47 @@ def _require_supabase():
         )
 
 
+def _cached_read(key: tuple) -> Any | None:
+    """Cached Supabase result for a read, or None."""
+    with _jobs_cache_lock:
+        return _jobs_cache.get(key)
+
+
+def _store_read(key: tuple, data: Any) -> None:
+    """Remember a Supabase read result (key[0] is always the user id)."""
+    with _jobs_cache_lock:
+        _jobs_cache[key] = data
+
+
+def _encode_cursor(job: dict) -> str:
+    """Opaque cursor pointing just past this job (newest-first Order)."""
+    raw = json.dumps([job["created_at"], job["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    """Turn a cursor back into (created_at, id), 400 if it's Garbage."""
+    try:
+        created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        # Validate the timestamp so it can't smuggle anything into the filter
+        datetime.fromisoformat(created_at)
+        if not isinstance(job_id, str) or any(c in job_id for c in '",()'):
+            raise ValueError("bad job id")
+    except (ValueError, TypeError, binascii.Error, UnicodeEncodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return created_at, job_id
+
+
+def _invalidate_user(user_id: str) -> None:
+    """Drop every cached read for a user after they change a Job."""
+    with _jobs_cache_lock:
+        for key in [k for k in _jobs_cache if k[0] == user_id]:
+            _jobs_cache.pop(key, None)
+
+
 # ============================================
 # MODELS
 # ============================================
@@ -109,15 +171,22 @@ class JobResponse(BaseModel):
     updated_at: datetime
 
 
+# Columns JobResponse actually uses - reads ask for these instead of "*", so
+# a column added to the table later doesn't silently ride along on every Row
+_JOB_COLUMNS = ",".join(JobResponse.model_fields)
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
 
 @router.get("", response_model=List[JobResponse])
 async def list_jobs(
+    response: Response,
     user: AuthenticatedUser = Depends(get_current_user),
     limit: int = 50,
-    offset: int = 0
+    offset: int = 0,
+    cursor: str | None = None,
 ):
     """
     List all jobs for the current user.
@@ -125,20 +194,47 @@ async def list_jobs(
     Returns a paginated list of the user's fine-tuning jobs, newest first.
     Each job contains the full configuration and status.
     
+    Pagination is keyset-based: when there may be more jobs, the response
+    carries an X-Next-Cursor header - pass it back as ?cursor= for the next
+    page. Cost stays O(limit) however deep you go, and jobs inserted while
+    scrolling don't shift pages. offset is still accepted for older clients.
+    
     Note: Requires Supabase database connection. Returns 503 in local dev mode.
     """
     _require_supabase()
     
-    supabase = get_supabase_client()
+    cache_key = (user.id, "list", limit, offset, cursor)
+    jobs = _cached_read(cache_key)
     
-    response = supabase.table("jobs") \
-        .select("*") \
-        .eq("user_id", user.id) \
-        .order("created_at", desc=True) \
-        .range(offset, offset + limit - 1) \
-        .execute()
+    if jobs is None:
+        supabase = get_supabase_client()
+        
+        query = supabase.table("jobs") \
+            .select(_JOB_COLUMNS) \
+            .eq("user_id", user.id) \
+            .order("created_at", desc=True) \
+            .order("id", desc=True)
+        
+        if cursor:
+            # Everything strictly after (created_at, id) in newest-first order
+            created_at, job_id = _decode_cursor(cursor)
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{job_id}")'
+            ).limit(limit)
+        elif offset:
+            query = query.range(offset, offset + limit - 1)
+        else:
+            query = query.limit(limit)
+        
+        jobs = query.execute().data
+        _store_read(cache_key, jobs)
     
-    return response.data
+    # A full page means there may be more
+    if jobs and len(jobs) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(jobs[-1])
+    
+    return jobs
 
 
 @router.get("/{job_id}", response_model=JobResponse)
@@ -148,21 +244,30 @@ async def get_job(
 ):
     """Get a specific job by ID."""
     _require_supabase()
+    
+    cache_key = (user.id, "job", job_id)
+    cached = _cached_read(cache_key)
+    if cached is not None:
+        return cached
+    
     supabase = get_supabase_client()
     
     response = supabase.table("jobs") \
-        .select("*") \
+        .select(_JOB_COLUMNS) \
         .eq("id", job_id) \
         .eq("user_id", user.id) \
-        .single() \
+        .maybe_single() \
         .execute()
     
-    if not response.data:
+    # maybe_single() hands back None on a miss (older clients return an
+    # empty response instead) - single() raised, surfacing as a 500
+    if response is None or not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found"
         )
     
+    _store_read(cache_key, response.data)
     return response.data
 
 
@@ -191,6 +296,7 @@ async def create_job(
             detail="Failed to create job"
         )
     
+    _invalidate_user(user.id)
     return response.data[0]
 
 
@@ -204,8 +310,8 @@ async def update_job(
     _require_supabase()
     supabase = get_supabase_client()
     
-    # Filter out None values
-    update_data = {k: v for k, v in updates.model_dump().items() if v is not None}
+    # Filter out None values (done inside pydantic-core, no dict rebuild)
+    update_data = updates.model_dump(exclude_none=True)
     
     if not update_data:
         raise HTTPException(
@@ -213,8 +319,7 @@ async def update_job(
             detail="No update fields provided"
         )
     
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    
+    # updated_at is set by the jobs_set_updated_at trigger, on the DB's Clock
     response = supabase.table("jobs") \
         .update(update_data) \
         .eq("id", job_id) \
@@ -227,6 +332,7 @@ async def update_job(
             detail="Job not found"
         )
     
+    _invalidate_user(user.id)
     return response.data[0]
 
 
@@ -239,38 +345,37 @@ async def delete_job(
     _require_supabase()
     supabase = get_supabase_client()
     
-    # Get job first to check ownership and get file paths
-    job_response = supabase.table("jobs") \
-        .select("*") \
-        .eq("id", job_id) \
-        .eq("user_id", user.id) \
-        .single() \
-        .execute()
+    # Ownership check + delete in one round-trip, hands back the file Paths
+    deleted = supabase.rpc(
+        "delete_job_owned",
+        {"p_job_id": job_id, "p_user_id": user.id},
+    ).execute()
     
-    if not job_response.data:
+    if not deleted.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found"
         )
     
-    job = job_response.data
+    job = deleted.data[0]
     
-    # Delete associated files from storage
-    try:
-        if job.get("dataset_path"):
-            supabase.storage.from_("datasets").remove([job["dataset_path"]])
-        if job.get("notebook_path"):
-            supabase.storage.from_("notebooks").remove([job["notebook_path"]])
-    except Exception:
-        pass  # Continue even if file deletion fails
-    
-    # Delete job record
-    supabase.table("jobs") \
-        .delete() \
-        .eq("id", job_id) \
-        .eq("user_id", user.id) \
-        .execute()
+    # Delete associated files from storage - one call per bucket, run side by
+    # side. A failed remove is logged, not raised: the row is already gone,
+    # and an orphaned file is the lesser Evil
+    removals = [
+        (bucket, job[column])
+        for bucket, column in (("datasets", "dataset_path"), ("notebooks", "notebook_path"))
+        if job.get(column)
+    ]
+    results = await asyncio.gather(
+        *(delete_from_storage(bucket, [path]) for bucket, path in removals),
+        return_exceptions=True,
+    )
+    for (bucket, path), result in zip(removals, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to delete {bucket}/{path} for job {job_id}: {result}")
     
+    _invalidate_user(user.id)
     return None
 
 
@@ -281,19 +386,28 @@ async def get_job_by_session(
 ):
     """Get a job by session ID."""
     _require_supabase()
+    
+    cache_key = (user.id, "session", session_id)
+    cached = _cached_read(cache_key)
+    if cached is not None:
+        return cached
+    
     supabase = get_supabase_client()
     
     response = supabase.table("jobs") \
-        .select("*") \
+        .select(_JOB_COLUMNS) \
         .eq("session_id", session_id) \
         .eq("user_id", user.id) \
-        .single() \
+        .maybe_single() \
         .execute()
     
-    if not response.data:
+    # maybe_single() hands back None on a miss (older clients return an
+    # empty response instead) - single() raised, surfacing as a 500
+    if response is None or not response.data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Job not found"
         )
     
+    _store_read(cache_key, response.data)
     return response.data
@@ -8,15 +8,27 @@ Provides dataset preview and analysis endpoints.
 @copyright 2026 Eshan Roy
 """
 
+from bisect import bisect_right
 from fastapi import APIRouter, HTTPException, status
 from typing import List, Dict
 from pydantic import BaseModel
 from collections import Counter
+from cachetools import TTLCache
 
-from app.session import session_manager
+from app.config import settings
+from app.session import session_manager, load_examples, load_example_page
 
 router = APIRouter(prefix="/preview", tags=["preview"])
 
+# A session's dataset is set once at upload and never changes, so its
+# distribution only needs computing once - kept as long as a session lives
+_distribution_cache: TTLCache = TTLCache(maxsize=256, ttl=settings.session_ttl_minutes * 60)
+
+# Token buckets for the distribution - an example lands in the bucket its
+# estimated token count bisects to, so there's no if/elif chain per Example
+TOKEN_BUCKET_BOUNDS = (100, 500, 1000)
+TOKEN_BUCKET_LABELS = ("0-100", "100-500", "500-1000", "1000+")
+
 
 # ============================================
 # MODELS
@@ -48,6 +60,22 @@ class PreviewResponse(BaseModel):
     page_size: int
 
 
+# ============================================
+# HELPERS
+# ============================================
+
+def _example_key(messages: list) -> tuple:
+    """
+    Dedupe key: an example's roles + first 100 chars per Message.
+
+    The tuple itself, not a hash of it - dict lookups still go by its hash,
+    but a hash match is confirmed by comparing the tuples, so two different
+    examples can never be reported as duplicates. No repr() string per
+    example and no encoding to Bytes.
+    """
+    return tuple((m.get("role", ""), m.get("content", "")[:100]) for m in messages)
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
@@ -74,19 +102,18 @@ async def get_preview(
             detail="Session not found"
         )
     
-    dataset = session.raw_data
-    if not dataset:
+    start = (page - 1) * page_size
+    end = start + page_size
+    
+    page_examples, total = await load_example_page(session, start, end)
+    if not total:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dataset not found in session"
         )
     
-    total = len(dataset)
-    start = (page - 1) * page_size
-    end = start + page_size
-    
     examples = []
-    for i, example in enumerate(dataset[start:end], start=start):
+    for i, example in enumerate(page_examples, start=start):
         messages = example.get("messages", [])
         # Estimate token count (rough approximation)
         text = " ".join(m.get("content", "") for m in messages)
@@ -116,62 +143,64 @@ async def get_distribution(session_id: str):
             detail="Session not found"
         )
     
-    dataset = session.raw_data
+    cached = _distribution_cache.get(session_id)
+    if cached is not None:
+        return cached
+    
+    dataset = await load_examples(session)
     if not dataset:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dataset not found in session"
         )
     
-    # Analyze roles
+    # One pass over every message: roles, lengths, words and user turns
     role_counts: Counter = Counter()
-    message_lengths: List[int] = []
-    token_buckets = {"0-100": 0, "100-500": 0, "500-1000": 0, "1000+": 0}
+    total_length = 0
+    message_count = 0
+    bucket_counts = [0] * len(TOKEN_BUCKET_LABELS)
     has_system = False
     multi_turn_count = 0
     
     for example in dataset:
         messages = example.get("messages", [])
+        words = 0
+        user_msgs = 0
         
-        # Count roles
         for msg in messages:
             role = msg.get("role", "unknown")
             role_counts[role] += 1
             
             content = msg.get("content", "")
-            message_lengths.append(len(content))
+            total_length += len(content)
+            message_count += 1
+            # Same count as splitting the space-joined text, minus the Join
+            words += len(content.split())
             
             if role == "system":
                 has_system = True
+            elif role == "user":
+                user_msgs += 1
         
         # Token bucket (per example)
-        total_text = " ".join(m.get("content", "") for m in messages)
-        tokens = int(len(total_text.split()) * 1.3)
-        
-        if tokens < 100:
-            token_buckets["0-100"] += 1
-        elif tokens < 500:
-            token_buckets["100-500"] += 1
-        elif tokens < 1000:
-            token_buckets["500-1000"] += 1
-        else:
-            token_buckets["1000+"] += 1
+        bucket_counts[bisect_right(TOKEN_BUCKET_BOUNDS, int(words * 1.3))] += 1
         
         # Multi-turn detection
-        user_msgs = sum(1 for m in messages if m.get("role") == "user")
         if user_msgs > 1:
             multi_turn_count += 1
     
-    avg_length = sum(message_lengths) / len(message_lengths) if message_lengths else 0
+    avg_length = total_length / message_count if message_count else 0
     multi_turn_pct = (multi_turn_count / len(dataset) * 100) if dataset else 0
     
-    return FieldDistribution(
+    distribution = FieldDistribution(
         roles=dict(role_counts),
         avg_message_length=round(avg_length, 1),
-        token_distribution=token_buckets,
+        token_distribution=dict(zip(TOKEN_BUCKET_LABELS, bucket_counts)),
         has_system_prompts=has_system,
         multi_turn_percentage=round(multi_turn_pct, 1)
     )
+    _distribution_cache[session_id] = distribution
+    return distribution
 
 
 @router.get("/{session_id}/duplicates", response_model=DuplicateInfo)
@@ -184,31 +213,29 @@ async def check_duplicates(session_id: str):
             detail="Session not found"
         )
     
-    dataset = session.raw_data
+    dataset = await load_examples(session)
     if not dataset:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dataset not found in session"
         )
     
-    # Create hashes of examples
-    seen: Dict[str, List[int]] = {}
+    # Key of each example -> index of its first occurrence. Only the repeats
+    # get a list; the keys reference strings the dataset already Holds.
+    seen: dict[tuple, int] = {}
+    repeats: dict[tuple, list[int]] = {}
     
     for i, example in enumerate(dataset):
-        messages = example.get("messages", [])
-        # Create a simple hash
-        hash_key = str([(m.get("role"), m.get("content", "")[:100]) for m in messages])
+        key = _example_key(example.get("messages", []))
         
-        if hash_key in seen:
-            seen[hash_key].append(i)
-        else:
-            seen[hash_key] = [i]
+        first = seen.setdefault(key, i)
+        if first != i:
+            repeats.setdefault(key, []).append(i)
     
-    # Find duplicates
+    # Find duplicates - grouped by example, in order of first Occurrence
     duplicate_indices = []
-    for indices in seen.values():
-        if len(indices) > 1:
-            duplicate_indices.extend(indices[1:])  # Keep first, mark rest as duplicates
+    for key in sorted(repeats, key=seen.__getitem__):
+        duplicate_indices.extend(repeats[key])  # Keep first, mark rest as duplicates
     
     return DuplicateInfo(
         count=len(duplicate_indices),
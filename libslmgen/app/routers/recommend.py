@@ -9,13 +9,14 @@ Returns model recommendations based on task and deployment target.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException, Depends
 
 from app.session import session_manager
 from app.models import RecommendRequest, RecommendationResponse
 from app.middleware.auth import get_optional_user, AuthenticatedUser, AnonymousUser
-from core import analyze_dataset, get_recommendations, ingest_data
+from core import analyze_dataset_cached, get_recommendations
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -51,17 +52,16 @@ async def get_model_recommendation(
     # Get or compute Characteristics
     characteristics = session.characteristics
     if characteristics is None:
-        # Need to Analyze first
-        data = session.raw_data
-        if not data and session.file_path:
-            data, _, error = ingest_data(session.file_path)
+        if session.file_path:
+            # Off the event loop, memoized per file - retries skip parse + Analysis
+            characteristics, error = await asyncio.to_thread(
+                analyze_dataset_cached, session.file_path
+            )
             if error:
                 raise HTTPException(status_code=500, detail=f"Failed to reload data: {error}")
-        
-        if not data:
+        else:
             raise HTTPException(status_code=400, detail="No data available.")
         
-        characteristics = analyze_dataset(data)
         session.characteristics = characteristics
     
     # Save user Selections
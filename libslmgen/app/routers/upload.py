@@ -9,20 +9,52 @@ Handles file uploads and initial dataset processing.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import asyncio
 import logging
+import os
+import sys
 import aiofiles
 from pathlib import Path
+from typing import BinaryIO
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 
 from app.config import settings
 from app.session import session_manager
 from app.models import UploadResponse
 from app.middleware.auth import get_optional_user, AuthenticatedUser, AnonymousUser
-from core import ingest_data, validate_quality
+from core import ingest_data_cached
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# sendfile() between two regular files is a Linux thing - elsewhere we
+# always take the chunked Path
+KERNEL_COPY_SUPPORTED = sys.platform.startswith("linux")
+
+# Read size for the chunked Path. 4MB means a 50MB upload is ~13 awaited
+# reads and writes instead of 50
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _copy_rolled_upload(src: BinaryIO, dst_path: Path) -> int:
+    """
+    Copy an upload Starlette has already spooled to disk, kernel to Kernel.
+    
+    os.sendfile moves the bytes between the two files without them passing
+    through Python - no 1MB bytes objects, no userspace copies. Runs in a
+    worker thread. Returns the number of bytes Written.
+    """
+    src_fd = src.fileno()
+    size = os.fstat(src_fd).st_size
+    offset = 0
+    with open(dst_path, "wb") as dst:
+        while offset < size:
+            sent = os.sendfile(dst.fileno(), src_fd, offset, size - offset)
+            if sent == 0:
+                break
+            offset += sent
+    return offset
+
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_dataset(
@@ -54,31 +86,45 @@ async def upload_dataset(
     file_path = Path(settings.upload_dir) / f"{session.id}.jsonl"
     total_size = 0
     
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {settings.max_upload_bytes // (1024*1024)}MB"
+    )
+    
     try:
-        async with aiofiles.open(file_path, "wb") as f:
-            # Stream file with size checking
-            while chunk := await file.read(1024 * 1024):  # 1MB chunks
-                total_size += len(chunk)
-                if total_size > settings.max_upload_bytes:
-                    await f.close()
-                    file_path.unlink(missing_ok=True)
-                    session_manager.delete(session.id)
-                    raise HTTPException(
-                        status_code=413,
-                        detail=f"File too large. Maximum size is {settings.max_upload_bytes // (1024*1024)}MB"
-                    )
-                await f.write(chunk)
+        # Anything over 1MB is already in a temp file on disk - its size is
+        # known, so check it up front and let the kernel do the Copy
+        if KERNEL_COPY_SUPPORTED and file.size is not None and getattr(file.file, "_rolled", False):
+            if file.size > settings.max_upload_bytes:
+                session_manager.delete(session.id)
+                raise too_large
+            total_size = await asyncio.to_thread(_copy_rolled_upload, file.file, file_path)
+        else:
+            async with aiofiles.open(file_path, "wb") as f:
+                # Stream file with size checking
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    total_size += len(chunk)
+                    if total_size > settings.max_upload_bytes:
+                        await f.close()
+                        file_path.unlink(missing_ok=True)
+                        session_manager.delete(session.id)
+                        raise too_large
+                    await f.write(chunk)
         
         logger.info(f"Saved upload to {file_path} ({total_size} bytes)")
     except HTTPException:
         raise
     except Exception as e:
+        file_path.unlink(missing_ok=True)  # don't leave a half-copied File
         session_manager.delete(session.id)
         logger.error(f"Failed to save file: {e}")
         raise HTTPException(status_code=500, detail="Failed to save file")
     
-    # Parse and validate the Data
-    data, stats, error = ingest_data(str(file_path))
+    # Parse, validate and score the Data in one pass - off the event loop, a
+    # big upload would otherwise stall every other request for the whole parse.
+    # Goes through the shared ingest cache, so the routes that read the
+    # examples back (load_examples) start with a Hit
+    _, stats, error = await asyncio.to_thread(ingest_data_cached, str(file_path))
     
     if error:
         # Cleanup on Error
@@ -86,15 +132,10 @@ async def upload_dataset(
         file_path.unlink(missing_ok=True)
         raise HTTPException(status_code=400, detail=error)
     
-    # Run quality Checks
-    quality_score, quality_issues = validate_quality(data)
-    stats.quality_score = quality_score
-    stats.quality_issues = quality_issues
-    
     # Update Session
     session.file_path = str(file_path)
+    session.file_size = total_size
     session.original_filename = file.filename
-    session.raw_data = data
     session.stats = stats
     session_manager.update(session)
     
@@ -10,122 +10,160 @@ We keep things simple here - no database, just a dict with some housekeeping.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
-import uuid
+import asyncio
+import os
+import secrets
 import logging
-from datetime import datetime, timedelta, timezone
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+
+from cachetools import TTLCache
 
 from .config import settings
+from .tokens import token_key
 from .models import DatasetStats, DatasetCharacteristics, TaskType, DeploymentTarget
+from core.ingest import forget_ingested, ingest_data_cached, read_examples
 
 logger = logging.getLogger(__name__)
 
+# Resolved (session, token) pairs for /download - a few per live Session
+DOWNLOAD_CACHE_SIZE = 1024
+
+# How often the background sweeper drops expired sessions (seconds)
+SESSION_SWEEP_INTERVAL = 60.0
+
+# Built once - refresh() runs on every session access
+SESSION_TTL = timedelta(minutes=settings.session_ttl_minutes)
+DOWNLOAD_TOKEN_TTL = timedelta(minutes=settings.download_token_ttl_minutes)
+
 
-@dataclass
+@dataclass(slots=True)
 class Session:
-    """Represents a single user Session with their data."""
+    """
+    Represents a single user Session with their data.
+    
+    Slotted - no per-instance __dict__, and a typo'd attribute assignment
+    fails loudly instead of quietly adding a new Field.
+    """
     id: str
     created_at: datetime
     expires_at: datetime
     
     # Owner tracking (None = anonymous session)
-    owner_id: Optional[str] = None
+    owner_id: str | None = None
     
     # Secure download token (regenerated on notebook creation)
-    download_token: Optional[str] = None
-    download_token_expires: Optional[datetime] = None
+    download_token: str | None = None
+    download_token_expires: datetime | None = None
     
     # File info
     file_path: str = ""
     original_filename: str = ""
+    file_size: int = 0  # bytes on disk, known at upload Time
     
-    # Processed data - we clear raw_data after Processing to save memory
-    raw_data: list[dict] = field(default_factory=list)
-    stats: Optional[DatasetStats] = None
-    characteristics: Optional[DatasetCharacteristics] = None
+    # Processed data - the parsed examples themselves aren't kept here, see
+    # load_examples()
+    stats: DatasetStats | None = None
+    characteristics: DatasetCharacteristics | None = None
     
     # User selections
-    task_type: Optional[TaskType] = None
-    deployment_target: Optional[DeploymentTarget] = None
-    selected_model_id: Optional[str] = None
+    task_type: TaskType | None = None
+    deployment_target: DeploymentTarget | None = None
+    selected_model_id: str | None = None
     
     # Generated notebook Path
-    notebook_path: Optional[str] = None
+    notebook_path: str | None = None
+    # Stat taken right after writing it, so downloads don't re-stat the File
+    notebook_stat: os.stat_result | None = None
     
-    def is_expired(self) -> bool:
-        """Check if session has Expired."""
-        return datetime.now(timezone.utc) > self.expires_at
+    def is_expired(self, now: datetime | None = None) -> bool:
+        """Check if session has Expired (pass now to reuse one clock Read)."""
+        return (now or datetime.now(UTC)) > self.expires_at
     
-    def refresh(self) -> None:
+    def refresh(self, now: datetime | None = None) -> None:
         """Extend session expiry Time."""
-        self.expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.session_ttl_minutes)
+        self.expires_at = (now or datetime.now(UTC)) + SESSION_TTL
+
+
+def _remove_files(session: Session) -> None:
+    """Best-effort delete of a session's upload and Notebook."""
+    # The parsed copy goes with the upload - nothing can ask for it again
+    if session.file_path:
+        forget_ingested(session.file_path)
+    # unlink(missing_ok) instead of exists() + unlink() - one syscall, not Two
+    for path in (session.file_path, session.notebook_path):
+        if path:
+            try:
+                Path(path).unlink(missing_ok=True)
+                logger.debug(f"Cleaned up file: {path}")
+            except Exception as e:
+                logger.warning(f"Failed to cleanup file {path}: {e}")
 
 
 class SessionManager:
     """
     Manages all active Sessions.
     
-    We keep a max of 25 sessions and cleanup expired ones on each Request.
-    This is fine for a demo app - production would use Redis or something.
+    We keep a max of 25 sessions. Expired ones are swept by a background
+    task (and before each create); reads just check the one session they
+    touch. This is fine for a demo app - production would use Redis or something.
     """
     
     def __init__(self):
-        self._sessions: dict[str, Session] = {}
+        # Kept in access order: every session gets the same TTL from its last
+        # access, so the front is always the next to expire (and the least
+        # recently used) - sweeps and evictions only ever look at the Front
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
         self._lock = __import__('threading').Lock()  # Thread safety for concurrent requests
+        # Download links that already passed validation, so repeat hits skip
+        # the expiry sweep and owner check - lives as long as a token can
+        self._download_cache: TTLCache = TTLCache(
+            maxsize=DOWNLOAD_CACHE_SIZE,
+            ttl=settings.download_token_ttl_minutes * 60,
+        )
         logger.info("SessionManager initialized")
     
-    def _cleanup_expired(self) -> int:
-        """Remove expired sessions, returns count Removed."""
-        expired_ids = [
-            sid for sid, sess in self._sessions.items()
-            if sess.is_expired()
-        ]
+    def _pop_expired(self) -> list[Session]:
+        """Take expired sessions out of the store - caller removes their Files."""
+        expired: list[Session] = []
+        now = datetime.now(UTC)
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if not oldest.is_expired(now):
+                break  # everything after this was touched more Recently
+            expired.append(self._sessions.popitem(last=False)[1])
         
-        for sid in expired_ids:
-            sess = self._sessions.pop(sid)
-            # Clean up the uploaded File too
-            if sess.file_path and Path(sess.file_path).exists():
-                try:
-                    Path(sess.file_path).unlink()
-                    logger.debug(f"Cleaned up file: {sess.file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to cleanup file {sess.file_path}: {e}")
+        if expired:
+            logger.info(f"Cleaned up {len(expired)} expired sessions")
         
-        if expired_ids:
-            logger.info(f"Cleaned up {len(expired_ids)} expired sessions")
-        
-        return len(expired_ids)
+        return expired
     
-    def _enforce_limit(self) -> None:
-        """Remove oldest sessions if we're over the Limit."""
+    def _pop_over_limit(self) -> list[Session]:
+        """Take least recently used sessions out while we're over the Limit."""
+        evicted: list[Session] = []
         while len(self._sessions) >= settings.max_sessions:
-            # Find the oldest Session
-            oldest_id = min(
-                self._sessions.keys(),
-                key=lambda sid: self._sessions[sid].created_at
-            )
-            old_sess = self._sessions.pop(oldest_id)
-            logger.info(f"Evicted old session {oldest_id} to make room")
-            
-            # Cleanup its File
-            if old_sess.file_path and Path(old_sess.file_path).exists():
-                try:
-                    Path(old_sess.file_path).unlink()
-                except Exception:
-                    pass  # best effort
-    
-    def create(self, owner_id: Optional[str] = None) -> Session:
+            old_id, old_sess = self._sessions.popitem(last=False)
+            logger.info(f"Evicted old session {old_id} to make room")
+            evicted.append(old_sess)
+        return evicted
+    
+    def _touch(self, session: Session, now: datetime) -> None:
+        """Refresh expiry and move to the back of the access Order."""
+        session.refresh(now)
+        self._sessions.move_to_end(session.id)
+    
+    def create(self, owner_id: str | None = None) -> Session:
         """Create a new Session, optionally linked to a user."""
         with self._lock:
             # Housekeeping first
-            self._cleanup_expired()
-            self._enforce_limit()
+            dropped = self._pop_expired() + self._pop_over_limit()
             
-            session_id = str(uuid.uuid4())
-            now = datetime.now(timezone.utc)
-            expires = now + timedelta(minutes=settings.session_ttl_minutes)
+            # 128 random bits, hex - same strength as a uuid4 without the UUID Object
+            session_id = secrets.token_hex(16)
+            now = datetime.now(UTC)
+            expires = now + SESSION_TTL
             
             session = Session(
                 id=session_id,
@@ -135,29 +173,32 @@ class SessionManager:
             )
             
             self._sessions[session_id] = session
-            logger.info(f"Created new session: {session_id} (owner: {owner_id or 'anonymous'})")
-            
-            return session
+        
+        # File deletes happen after the lock is released, so other requests
+        # never wait on disk I/O for sessions they don't Touch
+        for old in dropped:
+            _remove_files(old)
+        
+        logger.info(f"Created new session: {session_id} (owner: {owner_id or 'anonymous'})")
+        return session
     
-    def get(self, session_id: str) -> Optional[Session]:
+    def get(self, session_id: str) -> Session | None:
         """Get a session by ID, returns None if not Found or expired."""
         with self._lock:
-            self._cleanup_expired()
-            
             session = self._sessions.get(session_id)
             if session is None:
                 return None
             
-            if session.is_expired():
-                # shouldn't happen after cleanup but just in Case
-                self._sessions.pop(session_id, None)
+            now = datetime.now(UTC)
+            if session.is_expired(now):
+                # Left for the sweeper, which also removes its Files
                 return None
             
             # Refresh expiry on Access
-            session.refresh()
+            self._touch(session, now)
             return session
     
-    def get_with_owner(self, session_id: str, user_id: Optional[str]) -> Optional[Session]:
+    def get_with_owner(self, session_id: str, user_id: str | None) -> Session | None:
         """
         Get session only if user has access.
         
@@ -181,20 +222,16 @@ class SessionManager:
         logger.warning(f"Session {session_id} access denied for user {user_id}")
         return None
     
-    def generate_download_token(self, session_id: str) -> Optional[str]:
+    def generate_download_token(self, session_id: str) -> str | None:
         """Generate a secure download token for the session."""
         with self._lock:
             session = self._sessions.get(session_id)
             if session is None:
                 return None
             
-            import secrets
             token = secrets.token_urlsafe(32)
             session.download_token = token
-            session.download_token_expires = (
-                datetime.now(timezone.utc) + 
-                timedelta(minutes=settings.download_token_ttl_minutes)
-            )
+            session.download_token_expires = datetime.now(UTC) + DOWNLOAD_TOKEN_TTL
             
             logger.info(f"Generated download token for session {session_id}")
             return token
@@ -212,11 +249,50 @@ class SessionManager:
             if session.download_token_expires is None:
                 return False
             
-            if datetime.now(timezone.utc) > session.download_token_expires:
+            if datetime.now(UTC) > session.download_token_expires:
                 return False
             
             return True
     
+    def get_cached_download(
+        self, session_id: str, token: str, user_id: str | None
+    ) -> Session | None:
+        """
+        Session for a download link we've already validated, or None.
+
+        A hit is only trusted while the session is still the one in the
+        store, the token hasn't been rotated or expired, and the caller
+        still owns it - so deletes and new notebooks invalidate it for Free.
+        """
+        key = token_key(session_id, token)
+        with self._lock:
+            entry = self._download_cache.get(key)
+            if entry is None:
+                return None
+            session, owner_id = entry
+            now = datetime.now(UTC)
+
+            if (
+                self._sessions.get(session_id) is not session
+                or session.download_token != token
+                or session.is_expired(now)
+                or session.download_token_expires is None
+                or now > session.download_token_expires
+            ):
+                self._download_cache.pop(key, None)
+                return None
+
+            if owner_id is not None and owner_id != user_id:
+                return None
+
+            self._touch(session, now)
+            return session
+
+    def cache_download(self, session: Session, token: str) -> None:
+        """Remember a download link that just passed Validation."""
+        with self._lock:
+            self._download_cache[token_key(session.id, token)] = (session, session.owner_id)
+
     def update(self, session: Session) -> None:
         """Update session in Store."""
         with self._lock:
@@ -227,27 +303,63 @@ class SessionManager:
         """Delete a session and its Files."""
         with self._lock:
             session = self._sessions.pop(session_id, None)
-            if session is None:
-                return False
-            
-            # Cleanup files
-            for path in [session.file_path, session.notebook_path]:
-                if path and Path(path).exists():
-                    try:
-                        Path(path).unlink()
-                    except Exception:
-                        pass
-            
-            logger.info(f"Deleted session: {session_id}")
-            return True
+        if session is None:
+            return False
+        
+        _remove_files(session)
+        logger.info(f"Deleted session: {session_id}")
+        return True
+    
+    def sweep_expired(self) -> int:
+        """Drop expired sessions and their files, returns count Removed."""
+        with self._lock:
+            expired = self._pop_expired()
+        for sess in expired:
+            _remove_files(sess)
+        return len(expired)
     
     @property
     def active_count(self) -> int:
-        """Number of active Sessions."""
+        """Number of sessions held (expired ones count until the next Sweep)."""
         with self._lock:
-            self._cleanup_expired()
             return len(self._sessions)
 
 
+async def load_examples(session: Session) -> list[dict]:
+    """
+    The session's parsed examples, or [] if its file is gone or Invalid.
+    
+    Sessions only keep their file path. Holding every upload's parsed dicts
+    for the whole session lifetime was most of the heap; this reads through
+    the shared ingest cache instead (primed at upload, bounded by total file
+    size, and dropped with the session's files), so only a miss re-parses -
+    and that happens off the event Loop.
+    The list is shared with the cache - treat it as read-Only.
+    """
+    if not session.file_path:
+        return []
+    data, _, error = await asyncio.to_thread(ingest_data_cached, session.file_path)
+    return [] if error else data
+
+
+async def load_example_page(session: Session, start: int, stop: int) -> tuple[list[dict], int]:
+    """
+    Examples [start:stop] of the session's dataset, plus the total Count.
+    
+    For paging - once the parse has left the ingest cache, only the page's
+    own lines are read back (via the offset index) instead of the whole File.
+    """
+    if not session.file_path:
+        return [], 0
+    return await asyncio.to_thread(read_examples, session.file_path, start, stop)
+
+
 # Global session manager Instance
 session_manager = SessionManager()
+
+
+async def run_session_sweeper() -> None:
+    """Periodically drop expired sessions, off the request Path."""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        session_manager.sweep_expired()
@@ -22,20 +22,41 @@ Contributor: Vedant Singh Rajput <teleported0722@gmail.com>
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import asyncio
 import os
 import logging
+from collections.abc import Callable
 from functools import lru_cache
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Optional, TypeVar
 
-from supabase import create_client, Client
+import httpx
+
+# The supabase SDK (postgrest, storage3, realtime, auth...) is the heaviest
+# import in the app, and most requests never touch it - auth only needs the
+# env helpers below. So it's imported when a client is first Created.
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Connection pool shared by every Supabase client we build. The SDK is
+# sync, so this is an httpx.Client (the async one in app.http_client can't
+# be handed to it). Timeout matches the SDK's own postgrest Default.
+SUPABASE_HTTP_LIMITS = httpx.Limits(
+    max_connections=50,
+    max_keepalive_connections=20,
+    keepalive_expiry=30,
+)
+SUPABASE_HTTP_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
 
 # =============================================================================
 # Configuration Helpers
 # =============================================================================
 
+@lru_cache
 def is_supabase_configured() -> bool:
     """
     Check if Supabase environment variables are configured.
@@ -44,6 +65,9 @@ def is_supabase_configured() -> bool:
     you probably don't have Supabase env vars set. Routes that need the database
     can check this and return a helpful error message instead of crashing.
     
+    Read once, like the getters below - every jobs request asks, and the
+    environment doesn't change under a running Process.
+    
     Returns:
         True if SUPABASE_URL is set, False otherwise
     
@@ -54,7 +78,7 @@ def is_supabase_configured() -> bool:
     return bool(os.environ.get("SUPABASE_URL"))
 
 
-@lru_cache()
+@lru_cache
 def get_supabase_url() -> str:
     """Get Supabase project URL."""
     url = os.environ.get("SUPABASE_URL")
@@ -63,7 +87,7 @@ def get_supabase_url() -> str:
     return url
 
 
-@lru_cache()
+@lru_cache
 def get_supabase_anon_key() -> str:
     """Get Supabase anonymous/public key."""
     key = os.environ.get("SUPABASE_ANON_KEY")
@@ -72,7 +96,7 @@ def get_supabase_anon_key() -> str:
     return key
 
 
-@lru_cache()
+@lru_cache
 def get_supabase_service_key() -> str:
     """Get Supabase service role key (server-side only)."""
     key = os.environ.get("SUPABASE_SERVICE_KEY")
@@ -81,7 +105,7 @@ def get_supabase_service_key() -> str:
     return key
 
 
-@lru_cache()
+@lru_cache
 def get_jwt_secret() -> str:
     """
     Get Supabase JWT secret for token verification.
@@ -95,25 +119,60 @@ def get_jwt_secret() -> str:
     return secret
 
 
-def get_supabase_client() -> Client:
+@lru_cache
+def _get_http_client() -> httpx.Client:
+    """
+    The one pooled HTTP/2 client every Supabase client is built On.
+    
+    postgrest, storage and auth all send their apikey/Authorization
+    headers per request, so service, anon and user clients can share a
+    pool without leaking each other's Credentials.
+    """
+    return httpx.Client(
+        http2=True,
+        limits=SUPABASE_HTTP_LIMITS,
+        timeout=SUPABASE_HTTP_TIMEOUT,
+    )
+
+
+def _create_pooled_client(key: str) -> "Client":
+    """Build a Supabase client on the shared HTTP Pool."""
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+    
+    return create_client(
+        get_supabase_url(),
+        key,
+        options=SyncClientOptions(httpx_client=_get_http_client()),
+    )
+
+
+@lru_cache
+def get_supabase_client() -> "Client":
     """
     Get Supabase client with service role key.
     
     Use this for server-side operations that bypass RLS.
+    
+    Built once per process on a pooled HTTP/2 client, so jobs endpoints
+    reuse a warm connection instead of paying TCP + TLS on every Call.
+    Safe to share - the service key never signs in as a User.
     """
-    return create_client(get_supabase_url(), get_supabase_service_key())
+    return _create_pooled_client(get_supabase_service_key())
 
 
-def get_supabase_anon_client() -> Client:
+@lru_cache
+def get_supabase_anon_client() -> "Client":
     """
     Get Supabase client with anon key.
     
     Use this for operations that should respect RLS.
+    Built once per process, same as the service Client.
     """
-    return create_client(get_supabase_url(), get_supabase_anon_key())
+    return _create_pooled_client(get_supabase_anon_key())
 
 
-def get_user_client(access_token: str) -> Client:
+def get_user_client(access_token: str) -> "Client":
     """
     Get Supabase client authenticated as a specific user.
     
@@ -123,13 +182,68 @@ def get_user_client(access_token: str) -> Client:
     Returns:
         Supabase client with user's context
     """
-    client = create_client(get_supabase_url(), get_supabase_anon_key())
+    client = _create_pooled_client(get_supabase_anon_key())
     # Set the user's session
     client.auth.set_session(access_token, "")
     return client
 
 
+def close_supabase_client() -> None:
+    """Drop the cached clients and close the shared pool, if one was ever Built."""
+    get_supabase_client.cache_clear()
+    get_supabase_anon_client.cache_clear()
+    
+    if _get_http_client.cache_info().currsize == 0:
+        return
+    http_client = _get_http_client()
+    _get_http_client.cache_clear()
+    http_client.close()
+
+
 # Storage helpers
+
+# Storage calls are retried on transient failures - a dropped connection or
+# a 5xx - with the wait doubling from STORAGE_RETRY_BACKOFF seconds
+STORAGE_RETRY_ATTEMPTS = 3
+STORAGE_RETRY_BACKOFF = 0.5
+
+# Storage's remove endpoint takes at most this many paths per Request
+STORAGE_DELETE_BATCH = 1000
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Worth another Try? Network errors and server-side failures only."""
+    from storage3.exceptions import StorageApiError
+    
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, StorageApiError):
+        try:
+            return int(exc.status) >= 500
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def _storage_call(fn: Callable[..., T], *args: Any) -> T:
+    """
+    Run a sync storage SDK call in a thread, retrying transient Failures.
+    
+    The SDK is sync - calling it straight from a route would stall the event
+    loop for the whole request. Backoff waits are async sleeps, so a retry
+    doesn't hold a worker thread Either.
+    """
+    for attempt in range(STORAGE_RETRY_ATTEMPTS):
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            if attempt == STORAGE_RETRY_ATTEMPTS - 1 or not _is_transient(e):
+                raise
+            delay = STORAGE_RETRY_BACKOFF * 2 ** attempt
+            logger.warning(f"Storage call failed ({e}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+
+
 def get_storage_url() -> str:
     """Get Supabase storage URL."""
     return os.environ.get(
@@ -166,11 +280,20 @@ async def upload_to_storage(
     else:
         full_path = path
     
-    client.storage.from_(bucket).upload(
-        full_path,
-        file_content,
-        {"content-type": content_type}
-    )
+    bucket_api = client.storage.from_(bucket)
+    attempts = 0
+    
+    def upload() -> Any:
+        nonlocal attempts
+        attempts += 1
+        options = {"content-type": content_type}
+        # A try that timed out may still have landed - a retry overwrites it
+        # instead of failing on the 409 Duplicate
+        if attempts > 1:
+            options["upsert"] = "true"
+        return bucket_api.upload(full_path, file_content, options)
+    
+    await _storage_call(upload)
     
     logger.info(f"Uploaded file to {bucket}/{full_path}")
     return full_path
@@ -189,7 +312,9 @@ async def get_signed_url(bucket: str, path: str, expires_in: int = 3600) -> str:
         Signed download URL
     """
     client = get_supabase_client()
-    result = client.storage.from_(bucket).create_signed_url(path, expires_in)
+    result = await _storage_call(
+        client.storage.from_(bucket).create_signed_url, path, expires_in
+    )
     return result["signedURL"]
 
 
@@ -202,5 +327,23 @@ async def delete_from_storage(bucket: str, paths: list[str]) -> None:
         paths: List of file paths to delete
     """
     client = get_supabase_client()
-    client.storage.from_(bucket).remove(paths)
+    remove = client.storage.from_(bucket).remove
+    
+    # Big deletes go out in batches, side by side. Every batch gets its
+    # chance even if one fails - then the first failure is Raised
+    batches = [
+        paths[i:i + STORAGE_DELETE_BATCH]
+        for i in range(0, len(paths), STORAGE_DELETE_BATCH)
+    ]
+    results = await asyncio.gather(
+        *(_storage_call(remove, batch) for batch in batches),
+        return_exceptions=True,
+    )
+    
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for err in errors:
+        logger.warning(f"Failed to delete a batch from {bucket}: {err}")
+    if errors:
+        raise errors[0]
+    
     logger.info(f"Deleted {len(paths)} files from {bucket}")
@@ -0,0 +1,21 @@
+"""
+Token Keys.
+
+Shared helper for caches keyed by secrets (JWTs, download tokens).
+"""
+# Author: Eshan Roy <eshanized@proton.me>
+# License: MIT License
+# Copyright (c) 2026 Eshan Roy
+
+import hashlib
+
+
+def token_key(*parts: str) -> bytes:
+    """
+    16-byte BLAKE2b digest to use as a cache key instead of the raw Token.
+
+    A JWT is 1-2 KB; the digest is 16 bytes, compares in one memcmp and
+    means no cache ever holds a usable token in Memory. Multiple parts
+    are joined with ':' so (session_id, token) pairs key cleanly too.
+    """
+    return hashlib.blake2b(":".join(parts).encode(), digest_size=16).digest()
@@ -9,16 +9,16 @@ Contains data processing, analysis, and notebook generation logic.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
-from .ingest import ingest_data
+from .ingest import forget_ingested, ingest_data, ingest_data_cached, read_examples
 from .quality import validate_quality
-from .analyzer import analyze_dataset
+from .analyzer import analyze_dataset, analyze_dataset_cached
 from .recommender import get_recommendations
-from .notebook import generate_notebook
+from .notebook import generate_notebook, generate_notebook_parts
 
 # Advanced features
 from .personality import detect_personality
 from .risk import estimate_hallucination_risk
-from .confidence import calculate_confidence
+from .confidence import calculate_confidence, calculate_confidence_cached
 from .behavior import compose_behavior, BehaviorConfig
 from .prompt_linter import lint_prompt
 from .failure_preview import generate_failure_previews
@@ -29,14 +29,20 @@ from .reverse_prompt import infer_reverse_prompt  # FIX: C1 - Added missing modu
 __all__ = [
     # Core
     "ingest_data",
+    "ingest_data_cached",
+    "forget_ingested",
+    "read_examples",
     "validate_quality",
     "analyze_dataset",
+    "analyze_dataset_cached",
     "get_recommendations",
     "generate_notebook",
+    "generate_notebook_parts",
     # Advanced
     "detect_personality",
     "estimate_hallucination_risk",
     "calculate_confidence",
+    "calculate_confidence_cached",
     "compose_behavior",
     "BehaviorConfig",
     "lint_prompt",
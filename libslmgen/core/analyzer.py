@@ -10,15 +10,110 @@ Things like: is it multilingual? Does it look like JSON output? etc.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import os
 import re
 import logging
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
 
 from app.models import DatasetCharacteristics
+from .ingest import ingest_data_cached
 
 logger = logging.getLogger(__name__)
 
+# Characteristics are a handful of fields, so we can afford to keep plenty
+ANALYZE_CACHE_SIZE = 128
+
+# How many entries the sampled heuristics look At
+MULTILINGUAL_SAMPLE = 500
+JSON_SAMPLE = 200
+LANGUAGE_SAMPLE = 100
+
+# Common words in different Languages. A word can count for more than one
+# language ("la", "un"), so these are looked up per word rather than run as
+# one big alternation, which would hand each match to the first Language
+_LANG_WORDS = {
+    "en": frozenset({"the", "is", "are", "was", "were", "have", "has", "been", "will", "would", "could", "should"}),
+    "es": frozenset({"el", "la", "los", "las", "un", "una", "es", "son", "está", "están", "para", "con", "por"}),
+    "fr": frozenset({"le", "la", "les", "un", "une", "est", "sont", "dans", "pour", "avec", "sur"}),
+    "de": frozenset({"der", "die", "das", "ein", "eine", "ist", "sind", "für", "mit", "auf", "von"}),
+}
+# Whole words - the same spans \b(...)\b would match
+_WORD_REGEX = re.compile(r"\w+")
+# The script ranges don't overlap, so one scan can count all three
+_SCRIPT_REGEX = re.compile(
+    r"(?P<zh>[\u4e00-\u9fff])"  # Chinese characters
+    r"|(?P<ja>[\u3040-\u309f\u30a0-\u30ff])"  # Hiragana/Katakana
+    r"|(?P<ko>[\uac00-\ud7af])"  # Korean Hangul
+)
+
+
+@dataclass
+class _Scan:
+    """Everything the heuristics count, gathered in one walk over the Data."""
+    # Multilingual sample (first MULTILINGUAL_SAMPLE entries)
+    total_chars: int = 0
+    non_ascii_chars: int = 0
+    # Assistant responses
+    responses: int = 0
+    response_chars: int = 0
+    # JSON sample (first JSON_SAMPLE entries)
+    json_sampled: int = 0
+    json_like: int = 0
+    # Conversations with more than one user/assistant Exchange
+    multi_turn: int = 0
+    has_system: bool = False
+
+
+def _scan(data: list[dict]) -> _Scan:
+    """
+    Walk the dataset once, counting for every heuristic at the same Time.
+    
+    Each check used to re-walk every message of every entry on its own;
+    the sample windows they use are kept, just checked by index Here.
+    """
+    scan = _Scan()
+    
+    for idx, entry in enumerate(data):
+        in_lang_sample = idx < MULTILINGUAL_SAMPLE
+        in_json_sample = idx < JSON_SAMPLE
+        turns = 0  # system message excluded from the turn Count
+        
+        for msg in entry.get("messages", []):
+            role = msg.get("role")
+            content = msg.get("content", "")
+            
+            if in_lang_sample:
+                scan.total_chars += len(content)
+                # Most text is pure ASCII - isascii() answers that in C, and
+                # otherwise the dropped-by-encode count is the non-ASCII Count
+                if not content.isascii():
+                    scan.non_ascii_chars += len(content) - len(content.encode("ascii", "ignore"))
+            
+            if role == "system":
+                scan.has_system = True
+                continue
+            
+            turns += 1
+            if role == "assistant":
+                scan.responses += 1
+                scan.response_chars += len(content)
+                
+                if in_json_sample:
+                    scan.json_sampled += 1
+                    # Check if starts with { or [ (JSON-ish)
+                    stripped = content.lstrip()
+                    if stripped and stripped[0] in "{[":
+                        scan.json_like += 1
+        
+        if turns > 2:
+            scan.multi_turn += 1
+    
+    return scan
+
 
-def _check_multilingual(data: list[dict]) -> tuple[bool, str]:
+def _check_multilingual(scan: _Scan) -> tuple[bool, str]:
     """
     Detect if dataset is multilingual using non-ASCII character ratio.
     
@@ -35,20 +130,8 @@ def _check_multilingual(data: list[dict]) -> tuple[bool, str]:
     occasional accented characters while catching genuinely 
     multilingual datasets.
     """
-    non_ascii_count = 0
-    total_chars = 0
-    
-    # Sample a subset if dataset is large
-    sample = data[:500] if len(data) > 500 else data
-    
-    for entry in sample:
-        for msg in entry.get("messages", []):
-            content = msg.get("content", "")
-            total_chars += len(content)
-            non_ascii_count += sum(1 for c in content if ord(c) > 127)
-    
     # If more than 30% non-ASCII, likely multilingual
-    ratio = (non_ascii_count / total_chars) if total_chars > 0 else 0
+    ratio = (scan.non_ascii_chars / scan.total_chars) if scan.total_chars > 0 else 0
     
     if ratio > 0.3:
         return True, "multilingual"
@@ -58,99 +141,28 @@ def _check_multilingual(data: list[dict]) -> tuple[bool, str]:
     return False, "en"
 
 
-def _avg_response_length(data: list[dict]) -> int:
-    """Calculate average assistant response Length."""
-    lengths = []
-    
-    for entry in data:
-        for msg in entry.get("messages", []):
-            if msg.get("role") == "assistant":
-                lengths.append(len(msg.get("content", "")))
-    
-    return int(sum(lengths) / len(lengths)) if lengths else 0
-
-
-def _looks_like_json_output(data: list[dict]) -> bool:
-    """
-    Check if assistant responses look like JSON.
-    This affects model selection - some are better at structured Output.
-    """
-    json_like_count = 0
-    total_responses = 0
-    
-    # Sample for Efficiency
-    sample = data[:200] if len(data) > 200 else data
-    
-    for entry in sample:
-        for msg in entry.get("messages", []):
-            if msg.get("role") == "assistant":
-                total_responses += 1
-                content = msg.get("content", "").strip()
-                
-                # Check if starts with { or [ (JSON-ish)
-                if content and content[0] in "{[":
-                    json_like_count += 1
-    
-    # If more than 50% look like JSON
-    ratio = json_like_count / total_responses if total_responses > 0 else 0
-    return ratio > 0.5
-
-
-def _is_multi_turn(data: list[dict]) -> bool:
-    """Check if dataset is predominantly multi-turn."""
-    multi_turn_count = 0
-    
-    for entry in data:
-        messages = entry.get("messages", [])
-        # Exclude system message for turn Count
-        non_system = [m for m in messages if m.get("role") != "system"]
-        if len(non_system) > 2:
-            multi_turn_count += 1
-    
-    return (multi_turn_count / len(data)) > 0.5 if data else False
-
-
-def _has_system_prompts(data: list[dict]) -> bool:
-    """Check if dataset uses system Prompts."""
-    for entry in data:
-        for msg in entry.get("messages", []):
-            if msg.get("role") == "system":
-                return True
-    return False
-
-
 def _detect_dominant_language(data: list[dict]) -> str:
     """
     Try to detect the dominant Language.
     Uses some simple Heuristics based on common words.
     """
-    # Common words in different Languages
-    lang_patterns = {
-        "en": r"\b(the|is|are|was|were|have|has|been|will|would|could|should)\b",
-        "es": r"\b(el|la|los|las|un|una|es|son|está|están|para|con|por)\b",
-        "fr": r"\b(le|la|les|un|une|est|sont|dans|pour|avec|sur)\b",
-        "de": r"\b(der|die|das|ein|eine|ist|sind|für|mit|auf|von)\b",
-        "zh": r"[\u4e00-\u9fff]",  # Chinese characters
-        "ja": r"[\u3040-\u309f\u30a0-\u30ff]",  # Hiragana/Katakana
-        "ko": r"[\uac00-\ud7af]",  # Korean Hangul
-    }
-    
     # Collect all text
     all_text = " ".join(
         msg.get("content", "")
-        for entry in data[:100]  # sample
+        for entry in data[:LANGUAGE_SAMPLE]
         for msg in entry.get("messages", [])
     ).lower()
     
-    # Count matches for each Language
-    lang_scores = {}
-    for lang, pattern in lang_patterns.items():
-        matches = len(re.findall(pattern, all_text, re.IGNORECASE))
-        lang_scores[lang] = matches
+    # Count matches for each Language - one pass for words, one for Scripts
+    words = Counter(_WORD_REGEX.findall(all_text))
+    scripts = Counter(m.lastgroup for m in _SCRIPT_REGEX.finditer(all_text))
     
-    # Get the one with most Matches
-    if not lang_scores:
-        return "en"
+    lang_scores = {
+        lang: sum(words[w] for w in common)
+        for lang, common in _LANG_WORDS.items()
+    }
+    for lang in ("zh", "ja", "ko"):
+        lang_scores[lang] = scripts[lang]
     
     best_lang = max(lang_scores.keys(), key=lambda k: lang_scores[k])
     
@@ -167,14 +179,19 @@ def analyze_dataset(data: list[dict]) -> DatasetCharacteristics:
     """
     logger.info(f"Analyzing dataset with {len(data)} examples")
     
-    is_multi, lang_hint = _check_multilingual(data)
+    scan = _scan(data)
+    is_multi, lang_hint = _check_multilingual(scan)
+    
+    avg_response = int(scan.response_chars / scan.responses) if scan.responses else 0
+    # More than 50% JSON-ish - some models are better at structured Output
+    json_ratio = scan.json_like / scan.json_sampled if scan.json_sampled else 0
     
     chars = DatasetCharacteristics(
         is_multilingual=is_multi,
-        avg_response_length=_avg_response_length(data),
-        looks_like_json=_looks_like_json_output(data),
-        is_multi_turn=_is_multi_turn(data),
-        has_system_prompts=_has_system_prompts(data),
+        avg_response_length=avg_response,
+        looks_like_json=json_ratio > 0.5,
+        is_multi_turn=(scan.multi_turn / len(data)) > 0.5 if data else False,
+        has_system_prompts=scan.has_system,
         dominant_language=_detect_dominant_language(data) if is_multi else "en",
     )
     
@@ -182,3 +199,31 @@ def analyze_dataset(data: list[dict]) -> DatasetCharacteristics:
                 f"json_output={chars.looks_like_json}, multi_turn={chars.is_multi_turn}")
     
     return chars
+
+
+@lru_cache(maxsize=ANALYZE_CACHE_SIZE)
+def _analyze_by_identity(
+    file_path: str, mtime_ns: int, size: int
+) -> tuple[DatasetCharacteristics | None, str | None]:
+    """Reload + analyze, memoized on the file's identity (path, mtime, Size)."""
+    data, _, error = ingest_data_cached(file_path)
+    if error:
+        return None, error
+    return analyze_dataset(data), None
+
+
+def analyze_dataset_cached(file_path: str) -> tuple[DatasetCharacteristics | None, str | None]:
+    """
+    Characteristics for a dataset on disk, computed once per File.
+    
+    Repeat /analyze and /recommend calls for the same upload skip both
+    the parse and the analysis. Keyed like ingest_data_cached, so a
+    rewritten file is analyzed again.
+    
+    Returns (characteristics, None) or (None, error).
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None, f"File not found: {file_path}"
+    return _analyze_by_identity(file_path, st.st_mtime_ns, st.st_size)
@@ -10,14 +10,20 @@ Higher confidence = more reliable fine-tuning results.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
+import os
 import re
-import hashlib
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import Counter
+from functools import lru_cache
+
+from .ingest import ingest_data_cached
 
 logger = logging.getLogger(__name__)
 
+# A confidence result is a few floats and a sentence - cheap to keep Plenty
+CONFIDENCE_CACHE_SIZE = 128
+
 
 @dataclass
 class DatasetConfidence:
@@ -44,27 +50,86 @@ CONFIDENCE_WEIGHT_REDUNDANCY = 0.25  # Applied as (1 - redundancy) * weight
 CONFIDENCE_WEIGHT_DIVERSITY = 0.25
 CONFIDENCE_WEIGHT_BALANCE = 0.2
 
+# Words with 4+ chars, for the coverage Estimate
+_COVERAGE_WORD = re.compile(r"\b[a-z]{4,}\b")
+
 
-def _hash_content(text: str) -> str:
-    """Create hash for deduplication."""
-    return hashlib.md5(text.lower().strip().encode()).hexdigest()[:16]
+def _dedupe_key(text: str) -> str:
+    """
+    Normalized text to compare for Deduplication.
+    
+    The text itself, not a digest of it - conversations are capped at 100
+    chars a message here, and Counter hashes strings natively, so an md5
+    on top only cost time (and could, in theory, Collide).
+    """
+    return text.lower().strip()
 
 
-def _measure_coverage(data: list[dict]) -> tuple[float, str]:
+@dataclass
+class _Scan:
+    """Everything the confidence measures count, gathered in one walk over the Data."""
+    examples: int = 0
+    # Coverage - only the unique words are kept, never a list of every Word
+    vocabulary: set[str] = field(default_factory=set)
+    total_words: int = 0
+    # Redundancy
+    conversations: Counter = field(default_factory=Counter)
+    # Diversity - distinct values straight into sets, opening/ending
+    # (first/last 30 chars) only for longer Responses
+    responses: int = 0
+    lengths: set[int] = field(default_factory=set)
+    long_responses: int = 0
+    openings: set[str] = field(default_factory=set)
+    endings: set[str] = field(default_factory=set)
+    # Balance
+    user_messages: int = 0
+
+
+def _scan(data: list[dict]) -> _Scan:
     """
-    Estimate topic coverage based on vocabulary breadth.
-    Returns (score 0-1, note).
+    Walk the dataset once, counting for every measure at the same Time.
+    
+    Coverage, redundancy, diversity and balance each used to re-walk every
+    message of every entry on their Own.
     """
-    all_text = []
-    for entry in data:
-        for msg in entry.get("messages", []):
-            all_text.append(msg.get("content", ""))
+    scan = _Scan()
     
-    combined = " ".join(all_text).lower()
-    words = re.findall(r"\b[a-z]{4,}\b", combined)  # words with 4+ chars
+    for entry in data:
+        scan.examples += 1
+        msgs = entry.get("messages", [])
+        key_parts = []
+        
+        for msg in msgs:
+            content = msg.get("content", "")
+            key_parts.append(content[:100])
+            
+            words = _COVERAGE_WORD.findall(content.lower())
+            scan.total_words += len(words)
+            scan.vocabulary.update(words)
+            
+            role = msg.get("role")
+            if role == "user":
+                scan.user_messages += 1
+            elif role == "assistant":
+                scan.responses += 1
+                scan.lengths.add(len(content))
+                if len(content) > 30:
+                    scan.long_responses += 1
+                    scan.openings.add(content[:30].lower().strip())
+                    scan.endings.add(content[-30:].lower().strip())
+        
+        scan.conversations[_dedupe_key("|".join(key_parts))] += 1
     
-    unique_words = len(set(words))
-    total_words = len(words)
+    return scan
+
+
+def _measure_coverage(scan: _Scan) -> tuple[float, str]:
+    """
+    Estimate topic coverage based on vocabulary breadth.
+    Returns (score 0-1, note).
+    """
+    unique_words = len(scan.vocabulary)
+    total_words = scan.total_words
     
     if total_words == 0:
         return 0.3, "No text content found"
@@ -83,23 +148,15 @@ def _measure_coverage(data: list[dict]) -> tuple[float, str]:
         return coverage, "Limited vocabulary breadth"
 
 
-def _measure_redundancy(data: list[dict]) -> tuple[float, str]:
+def _measure_redundancy(scan: _Scan) -> tuple[float, str]:
     """
     Check for duplicate or near-duplicate examples.
     Returns (penalty 0-1 where 0 is best, note).
     """
-    # Hash conversations for comparison
-    conv_hashes = []
-    for entry in data:
-        msgs = entry.get("messages", [])
-        content = "|".join(m.get("content", "")[:100] for m in msgs)
-        conv_hashes.append(_hash_content(content))
-    
     # Count duplicates
-    counts = Counter(conv_hashes)
-    dup_count = sum(c - 1 for c in counts.values() if c > 1)
+    dup_count = sum(c - 1 for c in scan.conversations.values() if c > 1)
     
-    redundancy = dup_count / max(len(data), 1)
+    redundancy = dup_count / max(scan.examples, 1)
     
     if redundancy > 0.2:
         return redundancy, f"High redundancy: ~{int(redundancy * 100)}% duplicates"
@@ -109,31 +166,17 @@ def _measure_redundancy(data: list[dict]) -> tuple[float, str]:
     return redundancy, ""
 
 
-def _measure_diversity(data: list[dict]) -> tuple[float, str]:
+def _measure_diversity(scan: _Scan) -> tuple[float, str]:
     """
     Measure response diversity - how varied are the assistant outputs?
     Returns (score 0-1, note).
     """
-    responses = []
-    for entry in data:
-        for msg in entry.get("messages", []):
-            if msg.get("role") == "assistant":
-                responses.append(msg.get("content", ""))
-    
-    if len(responses) < 10:
+    if scan.responses < 10:
         return 0.5, "Too few responses for diversity analysis"
     
-    # Check length distribution
-    lengths = [len(r) for r in responses]
-    unique_lengths = len(set(lengths))
-    
-    # Check opening diversity (first 30 chars)
-    openings = [r[:30].lower().strip() for r in responses if len(r) > 30]
-    unique_openings = len(set(openings)) / max(len(openings), 1)
-    
-    # Check ending diversity
-    endings = [r[-30:].lower().strip() for r in responses if len(r) > 30]
-    unique_endings = len(set(endings)) / max(len(endings), 1)
+    unique_lengths = len(scan.lengths)
+    unique_openings = len(scan.openings) / max(scan.long_responses, 1)
+    unique_endings = len(scan.endings) / max(scan.long_responses, 1)
     
     # Combined diversity score
     diversity = (unique_openings + unique_endings + min(1.0, unique_lengths / 20)) / 3
@@ -146,20 +189,12 @@ def _measure_diversity(data: list[dict]) -> tuple[float, str]:
         return diversity, "Low response diversity - responses are very similar"
 
 
-def _measure_balance(data: list[dict]) -> tuple[float, str]:
+def _measure_balance(scan: _Scan) -> tuple[float, str]:
     """
     Check if dataset is balanced (user/assistant ratio).
     """
-    user_count = 0
-    assistant_count = 0
-    
-    for entry in data:
-        for msg in entry.get("messages", []):
-            role = msg.get("role")
-            if role == "user":
-                user_count += 1
-            elif role == "assistant":
-                assistant_count += 1
+    user_count = scan.user_messages
+    assistant_count = scan.responses
     
     if user_count == 0 or assistant_count == 0:
         return 0.2, "Missing user or assistant messages"
@@ -193,11 +228,12 @@ def calculate_confidence(data: list[dict]) -> DatasetConfidence:
             explanation="Too few examples for confident training. Add at least 50 examples."
         )
     
-    # Run measurements
-    coverage, cov_note = _measure_coverage(data)
-    redundancy, red_note = _measure_redundancy(data)
-    diversity, div_note = _measure_diversity(data)
-    balance, bal_note = _measure_balance(data)
+    # Run measurements - one pass over the data, then each reads the Counts
+    scan = _scan(data)
+    coverage, cov_note = _measure_coverage(scan)
+    redundancy, red_note = _measure_redundancy(scan)
+    diversity, div_note = _measure_diversity(scan)
+    balance, bal_note = _measure_balance(scan)
     
     # Calculate overall score using documented weight constants
     # Coverage and diversity are positive, redundancy is negative
@@ -233,3 +269,31 @@ def calculate_confidence(data: list[dict]) -> DatasetConfidence:
         diversity=round(diversity, 2),
         explanation=explanation,
     )
+
+
+@lru_cache(maxsize=CONFIDENCE_CACHE_SIZE)
+def _confidence_by_identity(
+    file_path: str, mtime_ns: int, size: int
+) -> tuple[DatasetConfidence | None, str | None]:
+    """Reload + score, memoized on the file's identity (path, mtime, Size)."""
+    data, _, error = ingest_data_cached(file_path)
+    if error:
+        return None, error
+    return calculate_confidence(data), None
+
+
+def calculate_confidence_cached(file_path: str) -> tuple[DatasetConfidence | None, str | None]:
+    """
+    Confidence for a dataset on disk, computed once per File.
+    
+    The UI asks again every time the panel is shown; keyed like
+    analyze_dataset_cached, so a rewritten file is scored again.
+    Results are shared between callers - treat them as read-Only.
+    
+    Returns (confidence, None) or (None, error).
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None, f"File not found: {file_path}"
+    return _confidence_by_identity(file_path, st.st_mtime_ns, st.st_size)
@@ -16,6 +16,11 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Phrases that mark a refusal (matched on lowercased text) and markers that
+# mark code (matched as-is)
+REFUSAL_PHRASES = ("i can't", "i cannot", "i'm unable", "i won't")
+CODE_MARKERS = ("```", "def ", "function")
+
 
 @dataclass
 class FailureCase:
@@ -55,13 +60,16 @@ def _collect_patterns(data: list[dict]) -> dict:
                 all_responses.append(content)
                 patterns["response_lengths"].append(len(content))
                 
-                # Check for refusal patterns
-                refusal_words = ["i can't", "i cannot", "i'm unable", "i won't"]
-                if any(r in content.lower() for r in refusal_words):
-                    patterns["has_refusals"] = True
+                # Check for refusal patterns - once one's found there's no
+                # need to keep scanning, and the text is lowercased once,
+                # not once per Phrase
+                if not patterns["has_refusals"]:
+                    lowered = content.lower()
+                    if any(r in lowered for r in REFUSAL_PHRASES):
+                        patterns["has_refusals"] = True
                 
                 # Check for code
-                if "```" in content or "def " in content or "function" in content:
+                if not patterns["has_code"] and any(m in content for m in CODE_MARKERS):
                     patterns["has_code"] = True
     
     if all_responses:
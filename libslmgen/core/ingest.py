@@ -10,18 +10,35 @@ We're pretty strict here - bad data = bad models.
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
-import json
 import logging
+import os
+import threading
+from array import array
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
+
+import orjson
+from cachetools import LRUCache
 
 from app.models import DatasetStats
+from core.quality import QualityTally, score_quality
 
 logger = logging.getLogger(__name__)
 
 # Minimum examples needed for Fine-tuning
 MIN_EXAMPLES = 50
 
+# Parsed datasets kept around for reloads, bounded by the total size of their
+# source files rather than a count - a handful of big uploads or plenty of
+# small ones. Parsed dicts take a few times the JSONL's bytes, and one
+# max-size upload (100 MB by default) still has to Fit
+INGEST_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# Byte offsets of each accepted line, kept for far more files than the parsed
+# cache can hold - 8 bytes an example, so preview pages can seek straight to
+# their lines once a dataset's parse has been Evicted
+OFFSET_INDEX_SIZE = 256
+
 
 def _estimate_tokens(text: str) -> int:
     """
@@ -99,16 +116,23 @@ def ingest_data(file_path: str) -> tuple[list[dict], Optional[DatasetStats], Opt
     
     Returns:
         - raw_data: List of valid conversation Dicts
-        - stats: DatasetStats if successful, None on Error
+        - stats: DatasetStats (quality score included) if successful, None on Error
         - error: Error message if failed, None on Success
     """
+    data, stats, error, _ = _ingest(file_path)
+    return data, stats, error
+
+
+def _ingest(file_path: str) -> tuple[list[dict], DatasetStats | None, str | None, array]:
+    """ingest_data, plus the byte offset of every accepted Line."""
     path = Path(file_path)
+    offsets = array("q")
     
     if not path.exists():
-        return [], None, f"File not found: {file_path}"
+        return [], None, f"File not found: {file_path}", offsets
     
     if not path.suffix.lower() == ".jsonl":
-        return [], None, "File must have .jsonl extension"
+        return [], None, "File must have .jsonl extension", offsets
     
     data: list[dict] = []
     errors: list[str] = []
@@ -118,20 +142,25 @@ def ingest_data(file_path: str) -> tuple[list[dict], Optional[DatasetStats], Opt
     single_turn = 0
     multi_turn = 0
     has_system = False
+    quality = QualityTally()
     
     logger.info(f"Starting ingestion: {file_path}")
     
     try:
-        with open(path, "r", encoding="utf-8") as f:
+        # Binary mode - orjson parses UTF-8 bytes directly, no decode step
+        with open(path, "rb") as f:
+            pos = 0
             for line_num, line in enumerate(f, start=1):
+                line_start = pos
+                pos += len(line)
                 line = line.strip()
                 if not line:
                     continue  # skip empty Lines
                 
                 # Parse JSON
                 try:
-                    entry = json.loads(line)
-                except json.JSONDecodeError as e:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError as e:
                     errors.append(f"Line {line_num}: Invalid JSON - {e}")
                     continue
                 
@@ -144,6 +173,8 @@ def ingest_data(file_path: str) -> tuple[list[dict], Optional[DatasetStats], Opt
                 # Good entry - collect Stats
                 messages = entry["messages"]
                 data.append(entry)
+                offsets.append(line_start)
+                quality.add(entry)
                 
                 # Count tokens across all Messages
                 for msg in messages:
@@ -160,14 +191,14 @@ def ingest_data(file_path: str) -> tuple[list[dict], Optional[DatasetStats], Opt
     
     except Exception as e:
         logger.error(f"Failed to read file: {e}")
-        return [], None, f"Failed to read file: {e}"
+        return [], None, f"Failed to read file: {e}", offsets
     
     # Check minimum Examples
     if len(data) < MIN_EXAMPLES:
         return [], None, (
             f"Need at least {MIN_EXAMPLES} examples for fine-tuning. "
             f"You only have {len(data)}. Maybe try adding more data?"
-        )
+        ), offsets
     
     # Log any validation Errors we found
     if errors:
@@ -181,7 +212,9 @@ def ingest_data(file_path: str) -> tuple[list[dict], Optional[DatasetStats], Opt
     multi_pct = 100 - single_pct
     avg_tokens = total_tokens // total if total > 0 else 0
     
-    # Quality score will be computed Later by quality module
+    # Scored from the counts taken during the parse - no second pass over Data
+    quality_score, quality_issues = score_quality(quality)
+    
     stats = DatasetStats(
         total_examples=total,
         total_tokens=total_tokens,
@@ -189,10 +222,116 @@ def ingest_data(file_path: str) -> tuple[list[dict], Optional[DatasetStats], Opt
         single_turn_pct=single_pct,
         multi_turn_pct=multi_pct,
         has_system_prompts=has_system,
-        quality_score=1.0,  # placeholder, filled in by quality.py
-        quality_issues=[],
+        quality_score=quality_score,
+        quality_issues=quality_issues,
     )
     
     logger.info(f"Ingested {total} examples, {total_tokens} tokens")
     
-    return data, stats, None
+    return data, stats, None, offsets
+
+
+class _Ingested(NamedTuple):
+    """A cached parse, with the file identity it was taken From."""
+    mtime_ns: int
+    size: int
+    result: tuple[list[dict], DatasetStats | None, str | None]
+
+
+# Keyed by path, so a session's entry can be dropped along with its File
+_ingest_cache: LRUCache = LRUCache(
+    maxsize=INGEST_CACHE_MAX_BYTES,
+    # Empty files still take a slot's worth of Bookkeeping
+    getsizeof=lambda entry: max(entry.size, 1),
+)
+_ingest_cache_lock = threading.Lock()
+
+
+class _Offsets(NamedTuple):
+    """Line offsets of a file's accepted examples, with its Identity."""
+    mtime_ns: int
+    size: int
+    offsets: array
+
+
+_offset_index: LRUCache = LRUCache(maxsize=OFFSET_INDEX_SIZE)
+
+
+def ingest_data_cached(file_path: str) -> tuple[list[dict], DatasetStats | None, str | None]:
+    """
+    Like ingest_data, but repeat calls for an unchanged file are Free.
+    
+    Used when routes need to reload a dataset that's already been parsed.
+    Entries are checked against the file's mtime and size, so a rewritten
+    file is re-parsed. Results are shared between callers - treat them as
+    read-Only.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return ingest_data(file_path)
+    
+    with _ingest_cache_lock:
+        cached = _ingest_cache.get(file_path)
+    if cached is not None and (cached.mtime_ns, cached.size) == (st.st_mtime_ns, st.st_size):
+        return cached.result
+    
+    # Parse outside the lock - a long parse mustn't block every other Reader
+    data, stats, error, offsets = _ingest(file_path)
+    result = (data, stats, error)
+    # Rejected files are deleted straight away - only keep parses worth Reusing
+    if error is None:
+        with _ingest_cache_lock:
+            _offset_index[file_path] = _Offsets(st.st_mtime_ns, st.st_size, offsets)
+            if st.st_size <= INGEST_CACHE_MAX_BYTES:
+                _ingest_cache[file_path] = _Ingested(st.st_mtime_ns, st.st_size, result)
+    return result
+
+
+def read_examples(file_path: str, start: int, stop: int) -> tuple[list[dict], int]:
+    """
+    Examples [start:stop] of a dataset, plus the total Count.
+    
+    Slices the cached parse when there is one. Otherwise seeks to the page's
+    lines through the offset index and parses only those, so paging through
+    an evicted dataset doesn't re-read the whole file. Falls back to a full
+    (cached) ingest when neither is around. A file that fails to ingest
+    reads as empty.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return [], 0
+    identity = (st.st_mtime_ns, st.st_size)
+    
+    with _ingest_cache_lock:
+        cached = _ingest_cache.get(file_path)
+        index = _offset_index.get(file_path)
+    if cached is not None and (cached.mtime_ns, cached.size) == identity:
+        data = cached.result[0]
+        return data[start:stop], len(data)
+    
+    if index is not None and (index.mtime_ns, index.size) == identity:
+        examples = []
+        try:
+            with open(file_path, "rb") as f:
+                for offset in index.offsets[start:stop]:
+                    f.seek(offset)
+                    examples.append(orjson.loads(f.readline()))
+        except (OSError, orjson.JSONDecodeError) as e:
+            # Changed underneath us within the same mtime tick - parse it Properly
+            logger.warning(f"Offset read of {file_path} failed, re-ingesting: {e}")
+        else:
+            return examples, len(index.offsets)
+    
+    data, _, error = ingest_data_cached(file_path)
+    if error:
+        return [], 0
+    return data[start:stop], len(data)
+
+
+def forget_ingested(file_path: str) -> None:
+    """Drop a file's cached parse - call when the file itself is Removed."""
+    with _ingest_cache_lock:
+        _ingest_cache.pop(file_path, None)
+        _offset_index.pop(file_path, None)
@@ -15,9 +15,20 @@ import json
 import base64
 import logging
 from datetime import datetime
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# One rendered skeleton per (model, task, gated) - MODELS x TaskType x 2 is well under This
+NOTEBOOK_SKELETON_CACHE_SIZE = 256
+
+# Placeholders left in the cached skeleton. Plain ASCII with no JSON escapes,
+# and '_' isn't in the base64 alphabet so the dataset can never collide
+_GENERATED_AT_SLOT = "__SLMGEN_GENERATED_AT__"
+_NUM_EXAMPLES_SLOT = "__SLMGEN_NUM_EXAMPLES__"
+_TRAINING_TIME_SLOT = "__SLMGEN_TRAINING_TIME__"
+_DATASET_SLOT = "__SLMGEN_DATASET_B64__"
+
 # LoRA target modules for different model architectures
 # Each architecture has specific projection layers that can be fine-tuned.
 # Using incorrect targets will cause training to fail or produce incorrect adapters.
@@ -111,42 +122,19 @@ def _make_code_cell(code: str, outputs: list | None = None) -> dict:
     }
 
 
-def generate_notebook(
-    dataset_jsonl: str,
+def _render_notebook(
     model_id: str,
     model_name: str,
-    model_size: str,
     task_type: str,
-    num_examples: int,
     is_gated: bool,
+    generated_at: str,
+    num_examples: str,
+    training_time: str,
+    dataset_b64: str,
 ) -> str:
-    """
-    Generate a complete Jupyter notebook for fine-tuning.
-    
-    The notebook includes:
-    1. Title and Overview
-    2. Unsloth installation
-    3. GPU Verification
-    4. HuggingFace login (if gated model)
-    5. Base64-embedded Dataset
-    6. Model loading with 4-bit quantization
-    7. Data formatting
-    8. SFTTrainer Training
-    9. Save LoRA adapter
-    10. Test Inference
-    11. Export options
-    
-    Returns: JSON string of the notebook
-    """
-    logger.info(f"Generating notebook for {model_name} with {num_examples} examples")
-    
-    # Encode dataset as Base64
-    dataset_b64 = base64.b64encode(dataset_jsonl.encode()).decode()
-    
+    """Lay out every cell and serialize the notebook to JSON."""
     # Get model-specific config
-    # FIX: A2 - is_gated now passed from caller (recommender) instead of re-detecting
     lora_targets = _get_lora_targets(model_id)
-    training_time = _estimate_training_time(model_size, num_examples)
     
     # Build notebook Cells
     cells = []
@@ -154,12 +142,12 @@ def generate_notebook(
     # 1. Title and Overview
     cells.append(_make_markdown_cell(f"""# 🚀 Fine-Tune {model_name} with Unsloth
 
-**Generated by SLMGEN** | {datetime.now().strftime("%Y-%m-%d %H:%M")}
+**Generated by SLMGEN** | {generated_at}
 
 ---
 
 ## Dataset Overview
-- **Examples:** {num_examples:,}
+- **Examples:** {num_examples}
 - **Task:** {task_type.replace("_", " ").title()}
 - **Model:** {model_name} ({model_id})
 - **Estimated Time:** ~{training_time} minutes on T4 GPU
@@ -442,6 +430,114 @@ Your fine-tuned model is ready! Here's what you can do:
         "cells": cells,
     }
     
+    return json.dumps(notebook, indent=2)
+
+
+@lru_cache(maxsize=NOTEBOOK_SKELETON_CACHE_SIZE)
+def _notebook_skeleton(
+    model_id: str,
+    model_name: str,
+    task_type: str,
+    is_gated: bool,
+) -> str:
+    """
+    Rendered notebook JSON with placeholder Slots.
+
+    Everything except the timestamp, example count, time estimate and the
+    dataset itself depends only on (model, task, gated) - and there's a
+    small fixed set of those - so each combination is rendered Once.
+    """
+    return _render_notebook(
+        model_id=model_id,
+        model_name=model_name,
+        task_type=task_type,
+        is_gated=is_gated,
+        generated_at=_GENERATED_AT_SLOT,
+        num_examples=_NUM_EXAMPLES_SLOT,
+        training_time=_TRAINING_TIME_SLOT,
+        dataset_b64=_DATASET_SLOT,
+    )
+
+
+def generate_notebook_parts(
+    dataset_jsonl: str | bytes | memoryview,
+    model_id: str,
+    model_name: str,
+    model_size: str,
+    task_type: str,
+    num_examples: int,
+    is_gated: bool,
+) -> tuple[str, str, str]:
+    """
+    Generate a complete Jupyter notebook for fine-tuning.
+    
+    The notebook includes:
+    1. Title and Overview
+    2. Unsloth installation
+    3. GPU Verification
+    4. HuggingFace login (if gated model)
+    5. Base64-embedded Dataset
+    6. Model loading with 4-bit quantization
+    7. Data formatting
+    8. SFTTrainer Training
+    9. Save LoRA adapter
+    10. Test Inference
+    11. Export options
+    
+    dataset_jsonl can be the raw file bytes (or a memoryview over an mmap of
+    the file) - saves a decode/encode round trip.
+    
+    Returns: (head, dataset_b64, tail) - the notebook JSON is their
+    concatenation. Kept apart so callers can write them out one by one
+    instead of building a second multi-MB String.
+    """
+    logger.info(f"Generating notebook for {model_name} with {num_examples} examples")
+    
+    # Encode dataset as Base64
+    if isinstance(dataset_jsonl, str):
+        dataset_jsonl = dataset_jsonl.encode()
+    dataset_b64 = base64.b64encode(dataset_jsonl).decode("ascii")
+    
+    # FIX: A2 - is_gated now passed from caller (recommender) instead of re-detecting
+    training_time = _estimate_training_time(model_size, num_examples)
+    
+    # Fill the small slots, and hand the (big) dataset back as its own piece
+    # instead of running it through json.dumps every Time
+    skeleton = (
+        _notebook_skeleton(model_id, model_name, task_type, is_gated)
+        .replace(_GENERATED_AT_SLOT, datetime.now().strftime("%Y-%m-%d %H:%M"))
+        .replace(_NUM_EXAMPLES_SLOT, f"{num_examples:,}")
+        .replace(_TRAINING_TIME_SLOT, str(training_time))
+    )
+    head, tail = skeleton.split(_DATASET_SLOT)
+    
     logger.info("Notebook generated successfully")
     
-    return json.dumps(notebook, indent=2)
+    return head, dataset_b64, tail
+
+
+def generate_notebook(
+    dataset_jsonl: str | bytes,
+    model_id: str,
+    model_name: str,
+    model_size: str,
+    task_type: str,
+    num_examples: int,
+    is_gated: bool,
+) -> str:
+    """
+    Generate a complete Jupyter notebook for fine-tuning.
+    
+    See generate_notebook_parts() for what goes in it.
+    
+    Returns: JSON string of the notebook
+    """
+    return "".join(generate_notebook_parts(
+        dataset_jsonl=dataset_jsonl,
+        model_id=model_id,
+        model_name=model_name,
+        model_size=model_size,
+        task_type=task_type,
+        num_examples=num_examples,
+        is_gated=is_gated,
+    ))
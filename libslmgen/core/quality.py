@@ -10,35 +10,63 @@ Score ranges from 0.0 (terrible) to 1.0 (great).
 # License: MIT License
 # Copyright (c) 2026 Eshan Roy
 
-import hashlib
 import logging
 from collections import Counter
+from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
 
-def _hash_conversation(entry: dict) -> str:
-    """Create a hash of conversation for dupe Detection."""
-    messages = entry.get("messages", [])
-    # Just hash the concatenated Content
-    content = "|".join(
-        f"{m.get('role')}:{m.get('content', '')}"
-        for m in messages
-    )
-    return hashlib.sha256(content.encode()).hexdigest()
+@dataclass
+class QualityTally:
+    """
+    Running counts behind the quality Checks.
+    
+    Fed one conversation at a time, so ingest can score a dataset in the
+    same pass that parses it instead of walking it all over Again.
+    """
+    total: int = 0
+    # Dupe detection keys on the (role, content) pairs themselves - the
+    # tuples only reference strings already in the dataset, and Counter
+    # compares on a hash match, so it's exact, not Probabilistic
+    conversations: Counter = field(default_factory=Counter)
+    empty_responses: int = 0
+    short_responses: int = 0
+    with_system: int = 0
+    
+    def add(self, entry: dict) -> None:
+        """Count one conversation Entry."""
+        self.total += 1
+        key = []
+        has_sys = False
+        
+        for msg in entry.get("messages", []):
+            role = msg.get("role")
+            content = msg.get("content", "")
+            key.append((role, content))
+            
+            if role == "assistant":
+                stripped = content.strip()
+                if not stripped:
+                    self.empty_responses += 1
+                elif len(stripped) < 10:
+                    self.short_responses += 1
+            elif role == "system":
+                has_sys = True
+        
+        self.conversations[tuple(key)] += 1
+        if has_sys:
+            self.with_system += 1
 
 
-def _check_duplicates(data: list[dict]) -> tuple[float, str]:
+def _check_duplicates(tally: QualityTally) -> tuple[float, str]:
     """
     Check for duplicate Conversations.
     Returns penalty (0-0.3) and issue Description.
     """
-    hashes = [_hash_conversation(entry) for entry in data]
-    counts = Counter(hashes)
-    
-    # Count actual duplicate instances (not unique hashes)
-    dupes = sum(c - 1 for c in counts.values() if c > 1)
-    dupe_pct = (dupes / len(data)) * 100 if data else 0
+    # Count actual duplicate instances (not unique keys)
+    dupes = sum(c - 1 for c in tally.conversations.values() if c > 1)
+    dupe_pct = (dupes / tally.total) * 100 if tally.total else 0
     
     if dupe_pct > 20:
         return 0.3, f"⚠️ High duplication: {dupe_pct:.1f}% of examples are duplicates"
@@ -50,12 +78,12 @@ def _check_duplicates(data: list[dict]) -> tuple[float, str]:
     return 0.0, ""
 
 
-def _check_size(data: list[dict]) -> tuple[float, str]:
+def _check_size(tally: QualityTally) -> tuple[float, str]:
     """
     Check dataset Size.
     Bigger is generally better for training Quality.
     """
-    count = len(data)
+    count = tally.total
     
     if count < 50:
         return 0.5, "❌ Too few examples - need at least 50"
@@ -69,19 +97,10 @@ def _check_size(data: list[dict]) -> tuple[float, str]:
     return 0.0, ""  # 1000+ is great
 
 
-def _check_empty_responses(data: list[dict]) -> tuple[float, str]:
+def _check_empty_responses(tally: QualityTally) -> tuple[float, str]:
     """Check for empty or very short responses."""
-    empty_count = 0
-    short_count = 0
-    
-    for entry in data:
-        for msg in entry.get("messages", []):
-            if msg.get("role") == "assistant":
-                content = msg.get("content", "").strip()
-                if not content:
-                    empty_count += 1
-                elif len(content) < 10:
-                    short_count += 1
+    empty_count = tally.empty_responses
+    short_count = tally.short_responses
     
     issues = []
     penalty = 0.0
@@ -90,30 +109,20 @@ def _check_empty_responses(data: list[dict]) -> tuple[float, str]:
         penalty += 0.2
         issues.append(f"❌ Found {empty_count} empty assistant responses")
     
-    if short_count > len(data) * 0.1:  # more than 10% very short
+    if short_count > tally.total * 0.1:  # more than 10% very short
         penalty += 0.1
         issues.append(f"⚠️ Many very short responses ({short_count})")
     
     return min(penalty, 0.2), " | ".join(issues) if issues else ""
 
 
-def _check_system_consistency(data: list[dict]) -> tuple[float, str]:
+def _check_system_consistency(tally: QualityTally) -> tuple[float, str]:
     """
     Check if system prompts are used Consistently.
     Inconsistent system prompts can confuse training.
     """
-    with_system = 0
-    without_system = 0
-    
-    for entry in data:
-        has_sys = any(
-            m.get("role") == "system"
-            for m in entry.get("messages", [])
-        )
-        if has_sys:
-            with_system += 1
-        else:
-            without_system += 1
+    with_system = tally.with_system
+    without_system = tally.total - tally.with_system
     
     # Check for Inconsistency
     if with_system > 0 and without_system > 0:
@@ -125,15 +134,15 @@ def _check_system_consistency(data: list[dict]) -> tuple[float, str]:
     return 0.0, ""
 
 
-def validate_quality(data: list[dict]) -> tuple[float, list[str]]:
+def score_quality(tally: QualityTally) -> tuple[float, list[str]]:
     """
-    Score the dataset Quality.
+    Score the dataset Quality from its running Counts.
     
     Returns:
         - score: Float from 0.0 to 1.0
         - issues: List of issue descriptions
     """
-    if not data:
+    if not tally.total:
         return 0.0, ["❌ Empty dataset"]
     
     total_penalty = 0.0
@@ -141,10 +150,10 @@ def validate_quality(data: list[dict]) -> tuple[float, list[str]]:
     
     # Run all Checks
     checks = [
-        _check_duplicates(data),
-        _check_size(data),
-        _check_empty_responses(data),
-        _check_system_consistency(data),
+        _check_duplicates(tally),
+        _check_size(tally),
+        _check_empty_responses(tally),
+        _check_system_consistency(tally),
     ]
     
     for penalty, issue in checks:
@@ -168,3 +177,16 @@ def validate_quality(data: list[dict]) -> tuple[float, list[str]]:
     logger.info(f"Quality score: {score:.2f} with {len(issues)-1} issues")
     
     return score, issues
+
+
+def validate_quality(data: list[dict]) -> tuple[float, list[str]]:
+    """
+    Score the dataset Quality.
+    
+    For data that's already in memory - ingest scores as it parses, so
+    uploads never come through Here.
+    """
+    tally = QualityTally()
+    for entry in data:
+        tally.add(entry)
+    return score_quality(tally)
@@ -176,6 +176,9 @@ MODELS: dict[str, ModelSpec] = {
     ),
 }
 
+# Same specs keyed by HF model_id - MODELS never changes at runtime, so build it Once
+MODELS_BY_ID: dict[str, ModelSpec] = {spec.model_id: spec for spec in MODELS.values()}
+
 
 def _score_task_fit(model: ModelSpec, task: TaskType) -> int:
     """Score model's fit for the Task (0-50 points)."""
@@ -0,0 +1,150 @@
+"""
+Regression tests for dataset characteristics.
+
+Pins analyze_dataset on small fixed datasets, so the single-pass scan
+keeps giving the answers the per-heuristic walks did.
+
+Covers:
+- System prompts and multi-turn conversations
+- Empty and short responses
+- JSON-looking output, including the sample window
+- Non-ASCII text and dominant language
+"""
+
+import sys
+from pathlib import Path
+
+# Import with path adjustment for test environment
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.analyzer import JSON_SAMPLE, analyze_dataset
+
+
+def _entry(*turns: tuple[str, str]) -> dict:
+    """Build one entry from (role, content) pairs."""
+    return {"messages": [{"role": role, "content": content} for role, content in turns]}
+
+
+def _mixed_dataset() -> list[dict]:
+    """System prompts, JSON replies, empty/short replies and a little Spanish."""
+    return [
+        _entry(
+            ("system", "You are a helpful assistant that answers in JSON."),
+            ("user", "What is the capital of France?"),
+            ("assistant", '{"answer": "Paris", "confidence": 0.98}'),
+        ),
+        _entry(
+            ("user", "List three primes"),
+            ("assistant", "  [2, 3, 5]"),
+        ),
+        _entry(("user", "Say nothing"), ("assistant", "")),
+        _entry(("user", "Yes or no?"), ("assistant", "ok")),
+        _entry(
+            ("user", "¿Cuál es la capital de España?"),
+            ("assistant", '{"respuesta": "Madrid", "país": "España"}'),
+        ),
+        _entry(
+            ("user", "Start a chat"),
+            ("assistant", '{"reply": "Hi!"}'),
+            ("user", "And then?"),
+            ("assistant", '{"reply": "Bye 👋"}'),
+        ),
+    ]
+
+
+class TestMixedDataset:
+    """Tests for a dataset touching every heuristic at once."""
+
+    def test_characteristics(self):
+        chars = analyze_dataset(_mixed_dataset())
+
+        assert chars.has_system_prompts is True
+        assert chars.looks_like_json is True
+        assert chars.is_multi_turn is False
+        assert chars.is_multilingual is False
+        assert chars.dominant_language == "en"
+        assert chars.avg_response_length == 18
+
+    def test_empty_and_short_responses_only(self):
+        data = [_entry(("user", "hello"), ("assistant", ""))] * 3 + [
+            _entry(("user", "hello"), ("assistant", "k"))
+        ]
+        chars = analyze_dataset(data)
+
+        # Empty strings count as responses, they just add no length
+        assert chars.avg_response_length == 0
+        assert chars.looks_like_json is False
+        assert chars.has_system_prompts is False
+
+    def test_empty_dataset(self):
+        chars = analyze_dataset([])
+
+        assert chars.avg_response_length == 0
+        assert chars.is_multi_turn is False
+        assert chars.looks_like_json is False
+        assert chars.is_multilingual is False
+
+
+class TestStructure:
+    """Tests for multi-turn and JSON detection."""
+
+    def test_multi_turn_majority(self):
+        long_chat = _entry(
+            ("system", "Be brief."),
+            ("user", "a"), ("assistant", "b"),
+            ("user", "c"), ("assistant", "d"),
+        )
+        # The system message doesn't count as a turn
+        short_chat = _entry(("system", "Be brief."), ("user", "a"), ("assistant", "b"))
+        assert analyze_dataset([long_chat, long_chat, short_chat]).is_multi_turn is True
+        assert analyze_dataset([long_chat, short_chat, short_chat]).is_multi_turn is False
+
+    def test_json_half_is_not_enough(self):
+        data = [
+            _entry(("user", "q"), ("assistant", '{"a": 1}')),
+            _entry(("user", "q"), ("assistant", "plain text")),
+        ]
+        assert analyze_dataset(data).looks_like_json is False
+
+    def test_json_only_sampled_from_the_start(self):
+        plain = _entry(("user", "q"), ("assistant", "plain text"))
+        structured = _entry(("user", "q"), ("assistant", '{"a": 1}'))
+        data = [plain] * JSON_SAMPLE + [structured] * (JSON_SAMPLE * 2)
+
+        assert analyze_dataset(data).looks_like_json is False
+
+
+class TestLanguage:
+    """Tests for non-ASCII text and language detection."""
+
+    def test_chinese_dataset(self):
+        data = [
+            _entry(("user", "今天天气怎么样？"), ("assistant", "今天天气很好，阳光明媚。")),
+            _entry(("user", "你好"), ("assistant", "你好！有什么可以帮你的吗？")),
+        ]
+        chars = analyze_dataset(data)
+
+        assert chars.is_multilingual is True
+        assert chars.dominant_language == "zh"
+        assert chars.avg_response_length == 12
+
+    def test_japanese_and_korean(self):
+        ja = [_entry(("user", "こんにちは"), ("assistant", "こんにちは、元気ですか"))]
+        ko = [_entry(("user", "안녕하세요"), ("assistant", "반갑습니다"))]
+
+        assert analyze_dataset(ja).dominant_language == "ja"
+        assert analyze_dataset(ko).dominant_language == "ko"
+
+    def test_some_non_english(self):
+        # About a sixth of the characters are non-ASCII - above 10%, under 30%
+        data = [_entry(("user", "Qué pasó"), ("assistant", "Está en el café"))] * 4
+        chars = analyze_dataset(data)
+
+        assert chars.is_multilingual is True
+        assert chars.dominant_language == "es"
+
+    def test_emoji_heavy_english_stays_english(self):
+        data = [_entry(("user", "🎉🎉🎉"), ("assistant", "🎉🎉 the party is here and it was great"))]
+        chars = analyze_dataset(data)
+
+        assert chars.is_multilingual is True
+        assert chars.dominant_language == "en"
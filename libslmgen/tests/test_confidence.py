@@ -0,0 +1,142 @@
+"""
+Regression tests for the dataset confidence score.
+
+Pins calculate_confidence on fixed datasets, so the single-sweep scan
+keeps giving the scores the per-measure walks did.
+
+Covers:
+- A mixed dataset (system prompts, empty/short/JSON replies, non-ASCII)
+- Duplicate-heavy datasets
+- Template-like responses
+- Too-small datasets
+"""
+
+import sys
+from pathlib import Path
+
+# Import with path adjustment for test environment
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.confidence import calculate_confidence
+
+_TOPICS = [
+    "photosynthesis", "volcanoes", "databases", "recursion", "gardening",
+    "astronomy", "economics", "painting", "football", "chemistry",
+]
+
+
+def _entry(*turns: tuple[str, str]) -> dict:
+    """Build one entry from (role, content) pairs."""
+    return {"messages": [{"role": role, "content": content} for role, content in turns]}
+
+
+def _mixed_dataset() -> list[dict]:
+    """60 examples mixing every kind of message the scan has to handle."""
+    data = []
+    for i in range(60):
+        topic = _TOPICS[i % len(_TOPICS)]
+        kind = i % 6
+        if kind == 0:
+            data.append(_entry(
+                ("system", "You are a concise tutor."),
+                ("user", f"Explain {topic} briefly, example {i}"),
+                ("assistant", f"Here is a short explanation about {topic} covering basics number {i}."),
+            ))
+        elif kind == 1:
+            data.append(_entry(("user", f"Anything on {topic}?"), ("assistant", "")))
+        elif kind == 2:
+            data.append(_entry(("user", f"Rate {topic}"), ("assistant", "ok")))
+        elif kind == 3:
+            data.append(_entry(
+                ("user", f"Give {topic} as JSON"),
+                ("assistant", f'{{"topic": "{topic}", "index": {i}, "tags": ["alpha", "beta"]}}'),
+            ))
+        elif kind == 4:
+            data.append(_entry(
+                ("user", f"¿Qué es {topic}? 第{i}题"),
+                ("assistant", f"Según los expertos, {topic} es fascinante — 很有趣 🌱 número {i}"),
+            ))
+        else:
+            data.append(_entry(
+                ("user", f"Tell me about {topic}"),
+                ("assistant", f"Sure, {topic} is broad."),
+                ("user", "Go deeper please"),
+                ("assistant", f"Digging deeper into {topic}, there are several layers worth studying."),
+            ))
+    return data
+
+
+class TestMixedDataset:
+    """Tests for a dataset touching every measure at once."""
+
+    def test_scores(self):
+        result = calculate_confidence(_mixed_dataset())
+
+        assert result.score == 0.55
+        assert result.level == "medium"
+        assert result.coverage == 0.04
+        assert result.redundancy == 0.25
+        assert result.diversity == 0.61
+        assert result.explanation == (
+            "Limited vocabulary breadth. High redundancy: ~25% duplicates. Moderate response diversity."
+        )
+
+
+class TestRedundancy:
+    """Tests for duplicate detection."""
+
+    def test_all_duplicates(self):
+        data = [_entry(("user", "Hello there"), ("assistant", "Hi, how can I help?"))] * 60
+        result = calculate_confidence(data)
+
+        assert result.score == 0.21
+        assert result.level == "low"
+        assert result.coverage == 0.0
+        assert result.redundancy == 0.98
+        assert result.diversity == 0.02
+        assert result.explanation == (
+            "Limited vocabulary breadth. High redundancy: ~98% duplicates. Low response diversity - responses are very similar."
+        )
+
+    def test_case_and_whitespace_duplicates(self):
+        data = _mixed_dataset()
+        # Same conversation as "Rate databases"/"ok", different case and
+        # padding - still a duplicate (15/60 -> 16/61)
+        data.append(_entry(("user", "  RATE Databases"), ("assistant", "OK  ")))
+        result = calculate_confidence(data)
+
+        assert result.redundancy == 0.26
+
+
+class TestDiversity:
+    """Tests for template-like responses."""
+
+    def test_templated_responses(self):
+        data = [
+            _entry(
+                ("user", f"Question number {i} about {_TOPICS[i % len(_TOPICS)]}"),
+                ("assistant", f"Thank you for your question. The answer is {i}. Have a nice day!"),
+            )
+            for i in range(60)
+        ]
+        result = calculate_confidence(data)
+
+        assert result.score == 0.55
+        assert result.level == "medium"
+        assert result.coverage == 0.01
+        assert result.redundancy == 0.0
+        assert result.diversity == 0.37
+        assert result.explanation == (
+            "Limited vocabulary breadth. Low response diversity - responses are very similar."
+        )
+
+
+class TestSmallDataset:
+    """Tests for datasets below the minimum."""
+
+    def test_too_few_examples(self):
+        result = calculate_confidence(_mixed_dataset()[:49])
+
+        assert result.score == 0.3
+        assert result.level == "low"
+        assert result.redundancy == 0.0
+        assert "at least 50 examples" in result.explanation
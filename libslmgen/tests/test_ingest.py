@@ -8,6 +8,9 @@ Covers:
 - Malformed JSON handling  
 - Non-UTF8 byte handling
 - Mixed valid/invalid lines
+- Cached reloads keyed by file identity
+- Paged reads through the line-offset index
+- Quality scoring during the parse
 """
 
 import json
@@ -17,7 +20,11 @@ from pathlib import Path
 # Import with path adjustment for test environment
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from core.ingest import ingest_data, MIN_EXAMPLES
+from core import ingest
+from core.ingest import ingest_data, ingest_data_cached, forget_ingested, read_examples, MIN_EXAMPLES
+from core.analyzer import analyze_dataset_cached
+from core.confidence import calculate_confidence_cached
+from core.quality import validate_quality
 
 
 def _create_temp_jsonl(lines: list[str], suffix: str = ".jsonl") -> str:
@@ -188,3 +195,195 @@ class TestFileExtension:
             assert ".jsonl" in error.lower()
         finally:
             Path(path).unlink()
+
+
+class TestQualityScoring:
+    """Test that ingest scores quality in the same pass."""
+    
+    def test_stats_match_separate_quality_pass(self):
+        """The fused score should equal a validate_quality() run over the data."""
+        lines = [_make_valid_entry(f"msg {i % 40}", f"response {i % 40}") for i in range(60)]
+        lines += [_make_valid_entry("empty", "")]
+        path = _create_temp_jsonl(lines)
+        try:
+            data, stats, error = ingest_data(path)
+            assert error is None
+            score, issues = validate_quality(data)
+            assert stats.quality_score == score
+            assert stats.quality_issues == issues
+            assert any("empty assistant" in issue for issue in issues)
+        finally:
+            Path(path).unlink()
+
+
+class TestCachedIngest:
+    """Test that reloads are memoized on the file's identity."""
+    
+    def test_unchanged_file_is_served_from_cache(self):
+        """Same file, same identity -> the very same parsed result."""
+        lines = [_make_valid_entry(f"msg {i}", f"response {i}") for i in range(60)]
+        path = _create_temp_jsonl(lines)
+        try:
+            first = ingest_data_cached(path)
+            second = ingest_data_cached(path)
+            assert first[2] is None
+            assert second is first
+        finally:
+            Path(path).unlink()
+    
+    def test_rewritten_file_is_reparsed(self):
+        """A file rewritten with different content should not be served stale."""
+        lines = [_make_valid_entry(f"msg {i}", f"response {i}") for i in range(60)]
+        path = _create_temp_jsonl(lines)
+        try:
+            data, _, _ = ingest_data_cached(path)
+            assert len(data) == 60
+            
+            more = lines + [_make_valid_entry("extra", "line")]
+            Path(path).write_text("\n".join(more) + "\n", encoding="utf-8")
+            
+            data, _, error = ingest_data_cached(path)
+            assert error is None
+            assert len(data) == 61
+        finally:
+            Path(path).unlink()
+    
+    def test_forgotten_file_is_reparsed(self):
+        """Dropping a file's entry means the next load parses it again."""
+        lines = [_make_valid_entry(f"msg {i}", f"response {i}") for i in range(60)]
+        path = _create_temp_jsonl(lines)
+        try:
+            first = ingest_data_cached(path)
+            forget_ingested(path)
+            second = ingest_data_cached(path)
+            assert second is not first
+            assert second[0] == first[0]
+        finally:
+            Path(path).unlink()
+    
+    def test_rejected_file_is_not_cached(self):
+        """Files that fail ingestion don't take up cache Space."""
+        lines = [_make_valid_entry(f"msg {i}", f"response {i}") for i in range(10)]
+        path = _create_temp_jsonl(lines)
+        try:
+            _, _, error = ingest_data_cached(path)
+            assert error is not None
+            assert path not in ingest._ingest_cache
+        finally:
+            Path(path).unlink()
+    
+    def test_file_over_budget_is_not_cached(self, monkeypatch):
+        """A file bigger than the whole byte budget is parsed but not Kept."""
+        monkeypatch.setattr(ingest, "INGEST_CACHE_MAX_BYTES", 100)
+        lines = [_make_valid_entry(f"msg {i}", f"response {i}") for i in range(60)]
+        path = _create_temp_jsonl(lines)
+        try:
+            data, _, error = ingest_data_cached(path)
+            assert error is None
+            assert len(data) == 60
+            assert path not in ingest._ingest_cache
+        finally:
+            Path(path).unlink()
+    
+    def test_analysis_is_memoized_per_file(self):
+        """Characteristics for an unchanged file are computed once."""
+        lines = [_make_valid_entry(f"msg {i}", f"response {i}") for i in range(60)]
+        path = _create_temp_jsonl(lines)
+        try:
+            first, error = analyze_dataset_cached(path)
+            second, _ = analyze_dataset_cached(path)
+            assert error is None
+            assert second is first
+        finally:
+            Path(path).unlink()
+    
+    def test_confidence_is_memoized_per_file(self):
+        """Confidence for an unchanged file is computed once."""
+        lines = [_make_valid_entry(f"msg {i}", f"response {i}") for i in range(60)]
+        path = _create_temp_jsonl(lines)
+        try:
+            first, error = calculate_confidence_cached(path)
+            second, _ = calculate_confidence_cached(path)
+            assert error is None
+            assert second is first
+        finally:
+            Path(path).unlink()
+
+
+class TestReadExamples:
+    """Test paged reads, with and without the parsed dataset cached."""
+    
+    def _mixed_file(self) -> str:
+        """60 valid examples with blank, malformed and invalid lines between them."""
+        lines = []
+        for i in range(60):
+            lines.append(_make_valid_entry(f"msg {i}", f"response {i} ünïcode"))
+            if i % 7 == 0:
+                lines.extend(["", "{not json", '{"messages": []}'])
+        return _create_temp_jsonl(lines)
+    
+    def test_page_from_cached_parse(self):
+        path = self._mixed_file()
+        try:
+            data, _, _ = ingest_data_cached(path)
+            page, total = read_examples(path, 10, 15)
+            assert total == 60
+            assert page == data[10:15]
+        finally:
+            Path(path).unlink()
+    
+    def test_page_through_offset_index(self, monkeypatch):
+        """With the parse evicted, the page is read by seeking, not re-ingesting."""
+        path = self._mixed_file()
+        try:
+            data, _, _ = ingest_data_cached(path)
+            ingest._ingest_cache.pop(path)
+            monkeypatch.setattr(ingest, "_ingest", None)
+            
+            page, total = read_examples(path, 55, 70)
+            assert total == 60
+            assert page == data[55:60]
+        finally:
+            Path(path).unlink()
+    
+    def test_uncached_file_is_ingested(self):
+        path = self._mixed_file()
+        try:
+            forget_ingested(path)
+            page, total = read_examples(path, 0, 3)
+            assert total == 60
+            assert [e["messages"][0]["content"] for e in page] == ["msg 0", "msg 1", "msg 2"]
+            assert path in ingest._offset_index
+        finally:
+            Path(path).unlink()
+    
+    def test_rewritten_file_is_not_read_by_stale_offsets(self):
+        path = self._mixed_file()
+        try:
+            ingest_data_cached(path)
+            ingest._ingest_cache.pop(path)
+            lines = [_make_valid_entry(f"new {i}", f"reply {i}") for i in range(61)]
+            Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+            
+            page, total = read_examples(path, 0, 1)
+            assert total == 61
+            assert page[0]["messages"][0]["content"] == "new 0"
+        finally:
+            Path(path).unlink()
+    
+    def test_forget_drops_offsets(self):
+        path = self._mixed_file()
+        try:
+            ingest_data_cached(path)
+            forget_ingested(path)
+            assert path not in ingest._offset_index
+        finally:
+            Path(path).unlink()
+    
+    def test_missing_or_rejected_file_reads_empty(self):
+        path = _create_temp_jsonl([_make_valid_entry()] * 10)
+        try:
+            assert read_examples(path, 0, 5) == ([], 0)
+        finally:
+            Path(path).unlink()
+        assert read_examples(path, 0, 5) == ([], 0)
@@ -6,7 +6,7 @@ Tests for notebook generation module.
 Covers:
 - Notebook JSON validity
 - LoRA target correctness per model
-- Base64 dataset round-trip
+- Base64 dataset round-trip (incl. cached skeleton reuse)
 - Gated vs non-gated behavior
 """
 
@@ -24,6 +24,17 @@ from core.notebook import (
 )
 
 
+def _embedded_b64(notebook: dict) -> str:
+    """Pull the DATASET_B64 payload out of a parsed notebook."""
+    import re
+    for cell in notebook["cells"]:
+        source = "".join(cell.get("source", []))
+        match = re.search(r'DATASET_B64 = "([^"]+)"', source)
+        if match:
+            return match.group(1)
+    raise AssertionError("no DATASET_B64 cell found")
+
+
 def _make_sample_dataset(n: int = 10) -> str:
     """Create a sample JSONL dataset string."""
     lines = []
@@ -187,9 +198,49 @@ class TestBase64RoundTrip:
         
         b64_content = match.group(1)
         decoded = base64.b64decode(b64_content).decode()
-        
+
         assert decoded == original_dataset
 
+    def test_bytes_dataset_matches_str(self):
+        """Raw file bytes should embed exactly like the decoded string."""
+        original_dataset = _make_sample_dataset(20)
+        kwargs = {
+            "model_id": "microsoft/Phi-4-mini-instruct",
+            "model_name": "Phi-4 Mini",
+            "model_size": "3.8B",
+            "task_type": "qa",
+            "num_examples": 20,
+            "is_gated": False,
+        }
+
+        from_str = json.loads(generate_notebook(dataset_jsonl=original_dataset, **kwargs))
+        from_bytes = json.loads(generate_notebook(dataset_jsonl=original_dataset.encode(), **kwargs))
+
+        # Compare structure and payload, not the full text - each notebook
+        # stamps the current minute, so two calls can straddle a boundary
+        assert [c["cell_type"] for c in from_str["cells"]] == [c["cell_type"] for c in from_bytes["cells"]]
+        assert _embedded_b64(from_str) == _embedded_b64(from_bytes)
+        assert base64.b64decode(_embedded_b64(from_bytes)).decode() == original_dataset
+
+    def test_cached_skeleton_fills_per_call_values(self):
+        """Reusing one model's skeleton must not leak data between calls."""
+        kwargs = {
+            "model_id": "microsoft/Phi-4-mini-instruct",
+            "model_name": "Phi-4 Mini",
+            "model_size": "3.8B",
+            "task_type": "qa",
+            "is_gated": False,
+        }
+
+        first = generate_notebook(dataset_jsonl=_make_sample_dataset(5), num_examples=5, **kwargs)
+        second = generate_notebook(dataset_jsonl=_make_sample_dataset(1500), num_examples=1500, **kwargs)
+
+        assert "__SLMGEN_" not in first + second
+        assert "**Examples:** 5\\n" in first
+        assert "**Examples:** 1,500\\n" in second
+        b64 = base64.b64encode(_make_sample_dataset(1500).encode()).decode()
+        assert f'DATASET_B64 = \\"{b64}\\"' in second
+
 
 class TestGatedModelBehavior:
     """Test that gated models get HuggingFace login cell."""
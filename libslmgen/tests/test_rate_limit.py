@@ -0,0 +1,201 @@
+"""
+Tests for the token bucket rate limiter.
+
+Covers:
+- Rejecting non-positive limits
+- Refill over time
+- 429 responses with Retry-After
+- Per-shard locking
+"""
+
+import sys
+import threading
+import types
+import zlib
+from pathlib import Path
+
+# Import with path adjustment for test environment
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import (
+    N_SHARDS,
+    TokenBucketLimiter,
+    TokenBucketMiddleware,
+    rate_limit_exceeded_response,
+)
+
+
+class _Clock:
+    """Hand-driven stand-in for time.monotonic."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def _shard(key: str) -> int:
+    return zlib.crc32(key.encode()) & (N_SHARDS - 1)
+
+
+class TestLimits:
+    """Tests for limiter construction."""
+
+    def test_zero_per_minute_rejected(self):
+        """A zero limit is refused up front instead of dividing by zero."""
+        with pytest.raises(ValueError):
+            TokenBucketLimiter(0)
+
+    def test_negative_per_minute_rejected(self):
+        with pytest.raises(ValueError):
+            TokenBucketLimiter(-5)
+
+
+class TestRefill:
+    """Tests for bucket draining and refill."""
+
+    def test_full_bucket_then_empty(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+        limiter = TokenBucketLimiter(60)
+
+        for _ in range(60):
+            assert limiter.hit("1.2.3.4") == 0.0
+        # Bucket is empty - one token comes back every second
+        assert limiter.hit("1.2.3.4") == pytest.approx(1.0)
+
+    def test_tokens_refill_with_time(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+        limiter = TokenBucketLimiter(60)
+
+        for _ in range(60):
+            limiter.hit("1.2.3.4")
+        assert limiter.hit("1.2.3.4") > 0
+
+        clock.now += 1.0
+        assert limiter.hit("1.2.3.4") == 0.0
+        assert limiter.hit("1.2.3.4") > 0
+
+    def test_refill_capped_at_capacity(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+        limiter = TokenBucketLimiter(2)
+
+        limiter.hit("1.2.3.4")
+        clock.now += 3600.0
+        # An hour idle still only buys `per_minute` requests
+        assert limiter.hit("1.2.3.4") == 0.0
+        assert limiter.hit("1.2.3.4") == 0.0
+        assert limiter.hit("1.2.3.4") > 0
+
+    def test_keys_are_independent(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+        limiter = TokenBucketLimiter(1)
+
+        assert limiter.hit("1.1.1.1") == 0.0
+        assert limiter.hit("1.1.1.1") > 0
+        assert limiter.hit("2.2.2.2") == 0.0
+
+
+class TestTooManyRequests:
+    """Tests for the 429 path."""
+
+    def test_retry_after_rounded_up(self):
+        response = rate_limit_exceeded_response(12.2)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "13"
+
+    def test_retry_after_at_least_one_second(self):
+        response = rate_limit_exceeded_response(0.01)
+        assert response.headers["Retry-After"] == "1"
+
+    def test_middleware_returns_429(self, monkeypatch):
+        monkeypatch.setattr(rate_limit, "general_limiter", TokenBucketLimiter(2))
+        app = Starlette(
+            routes=[
+                Route("/ping", lambda request: PlainTextResponse("pong")),
+                Route("/health", lambda request: PlainTextResponse("ok")),
+            ]
+        )
+        client = TestClient(TokenBucketMiddleware(app))
+
+        assert client.get("/ping").status_code == 200
+        assert client.get("/ping").status_code == 200
+
+        response = client.get("/ping")
+        assert response.status_code == 429
+        # Two per minute means the next token is ~30 seconds away
+        assert response.headers["Retry-After"] == "30"
+        assert response.json()["retry_after"] == 30
+
+        # Exempt paths are never charged
+        assert client.get("/health").status_code == 200
+
+    def test_forwarded_clients_counted_separately(self, monkeypatch):
+        monkeypatch.setattr(rate_limit, "general_limiter", TokenBucketLimiter(1))
+        app = Starlette(routes=[Route("/ping", lambda request: PlainTextResponse("pong"))])
+        client = TestClient(TokenBucketMiddleware(app))
+
+        assert client.get("/ping", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 200
+        assert client.get("/ping", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 429
+        assert client.get("/ping", headers={"X-Forwarded-For": "10.0.0.2, 10.0.0.1"}).status_code == 200
+
+
+class TestShardLocks:
+    """Tests that a held shard only blocks keys on that shard."""
+
+    def test_other_shard_not_blocked(self):
+        limiter = TokenBucketLimiter(60)
+        key_a = "10.0.0.1"
+        key_b = next(f"10.0.1.{i}" for i in range(256) if _shard(f"10.0.1.{i}") != _shard(key_a))
+        key_a2 = next(f"10.0.2.{i}" for i in range(256) if _shard(f"10.0.2.{i}") == _shard(key_a))
+
+        results: dict[str, float] = {}
+
+        def hit(key: str) -> None:
+            results[key] = limiter.hit(key)
+
+        with limiter._locks[_shard(key_a)]:
+            other = threading.Thread(target=hit, args=(key_b,))
+            other.start()
+            other.join(timeout=2)
+            # Different shard - goes straight through
+            assert not other.is_alive()
+
+            same = threading.Thread(target=hit, args=(key_a2,))
+            same.start()
+            same.join(timeout=0.2)
+            # Same shard - waits for the lock
+            assert same.is_alive()
+
+        same.join(timeout=2)
+        assert not same.is_alive()
+        assert results == {key_b: 0.0, key_a2: 0.0}
+
+    def test_concurrent_hits_never_overspend(self):
+        limiter = TokenBucketLimiter(100)
+        allowed = []
+
+        def worker() -> None:
+            for _ in range(50):
+                if limiter.hit("1.2.3.4") == 0.0:
+                    allowed.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 400 attempts against 100 tokens - only a sliver can refill meanwhile
+        assert 100 <= len(allowed) < 105
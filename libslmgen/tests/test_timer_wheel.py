@@ -0,0 +1,146 @@
+"""
+Tests for the hashed timer wheel.
+
+Covers:
+- Keys coming due at their deadline
+- Re-queueing touched buckets instead of evicting them
+- Advancing across a full wheel rotation
+- Rate-limit eviction only dropping idle buckets
+"""
+
+import sys
+import time
+import types
+from pathlib import Path
+
+# Import with path adjustment for test environment
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import TokenBucketLimiter
+from app.middleware.timer_wheel import TimerWheel
+
+
+def _base() -> float:
+    """A whole-second start time just ahead of the wheel's own clock."""
+    return float(int(time.monotonic()) + 1)
+
+
+class TestSchedule:
+    """Tests for scheduling and advancing."""
+
+    def test_key_due_at_deadline(self):
+        wheel = TimerWheel(n_slots=64)
+        base = _base()
+        wheel.schedule("a", base + 5)
+
+        assert wheel.advance(base + 4) == []
+        assert wheel.advance(base + 5) == ["a"]
+        assert len(wheel) == 0
+
+    def test_only_due_keys_returned(self):
+        wheel = TimerWheel(n_slots=64)
+        base = _base()
+        wheel.schedule("a", base + 2)
+        wheel.schedule("b", base + 10)
+
+        assert wheel.advance(base + 3) == ["a"]
+        assert len(wheel) == 1
+        assert wheel.advance(base + 10) == ["b"]
+
+    def test_past_deadline_fires_on_next_tick(self):
+        wheel = TimerWheel(n_slots=64)
+        base = _base()
+        wheel.advance(base + 10)
+        # Scheduling behind the clock must not land in an already-passed slot
+        wheel.schedule("late", base + 3)
+
+        assert wheel.advance(base + 11) == ["late"]
+
+    def test_advance_is_idempotent(self):
+        wheel = TimerWheel(n_slots=64)
+        base = _base()
+        wheel.schedule("a", base + 1)
+
+        assert wheel.advance(base + 1) == ["a"]
+        assert wheel.advance(base + 1) == []
+
+
+class TestReschedule:
+    """Tests for keys that are re-queued after coming due."""
+
+    def test_rescheduled_key_comes_due_again(self):
+        wheel = TimerWheel(n_slots=64)
+        base = _base()
+        wheel.schedule("a", base + 2)
+
+        assert wheel.advance(base + 2) == ["a"]
+        # Touched meanwhile - the caller pushes it back out
+        wheel.schedule("a", base + 7)
+        assert wheel.advance(base + 6) == []
+        assert wheel.advance(base + 7) == ["a"]
+
+
+class TestWrap:
+    """Tests for deadlines beyond one rotation."""
+
+    def test_far_deadline_survives_early_slot(self):
+        wheel = TimerWheel(n_slots=8)
+        base = _base()
+        # 20 ticks out on an 8-slot wheel - its slot comes round twice early
+        wheel.schedule("far", base + 20)
+
+        assert wheel.advance(base + 8) == []
+        assert len(wheel) == 1
+        assert wheel.advance(base + 16) == []
+        assert len(wheel) == 1
+        assert wheel.advance(base + 20) == ["far"]
+        assert len(wheel) == 0
+
+    def test_long_stall_covers_every_slot(self):
+        wheel = TimerWheel(n_slots=8)
+        base = _base()
+        for i in range(1, 8):
+            wheel.schedule(i, base + i)
+        wheel.schedule("later", base + 150)
+
+        # One jump far past a full rotation still expires everything due
+        assert sorted(wheel.advance(base + 100)) == list(range(1, 8))
+        assert len(wheel) == 1
+        assert wheel.advance(base + 150) == ["later"]
+
+
+class TestIdleEviction:
+    """Tests for TokenBucketLimiter.evict_idle."""
+
+    def test_only_idle_buckets_evicted(self, monkeypatch):
+        clock = types.SimpleNamespace(now=_base())
+        monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+        limiter = TokenBucketLimiter(60)
+        start = clock.now
+
+        limiter.hit("idle")
+        limiter.hit("busy")
+        assert len(limiter) == 2
+
+        clock.now = start + limiter.idle_ttl / 2
+        limiter.hit("busy")
+
+        clock.now = start + limiter.idle_ttl + 1
+        assert limiter.evict_idle() == 1
+        assert len(limiter) == 1
+
+        # "busy" was re-queued at its new deadline rather than dropped
+        clock.now = start + limiter.idle_ttl * 1.5 + 1
+        assert limiter.evict_idle() == 1
+        assert len(limiter) == 0
+
+    def test_nothing_evicted_before_ttl(self, monkeypatch):
+        clock = types.SimpleNamespace(now=_base())
+        monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+        limiter = TokenBucketLimiter(60)
+
+        limiter.hit("a")
+        clock.now += limiter.idle_ttl - 1
+        assert limiter.evict_idle() == 0
+        assert len(limiter) == 1
@@ -0,0 +1,5 @@
+-- SLMGEN Schema Migration: Keyset Pagination Index for Jobs
+-- Run this in Supabase SQL Editor if you already have the base schema
+
+-- GET /jobs pages with (created_at, id) cursors per user, newest first
+CREATE INDEX IF NOT EXISTS idx_jobs_user_created_id ON jobs(user_id, created_at DESC, id DESC);
@@ -0,0 +1,14 @@
+-- SLMGEN Schema Migration: Single Round-Trip Job Delete
+-- Run this in Supabase SQL Editor if you already have the base schema
+
+-- Ownership check + delete in one round-trip; returns the storage paths to clean up.
+-- Backend-only (service role) - it trusts the user_id it's given.
+CREATE OR REPLACE FUNCTION delete_job_owned(p_job_id UUID, p_user_id UUID)
+RETURNS TABLE (dataset_path TEXT, notebook_path TEXT) AS $$
+  DELETE FROM jobs
+  WHERE jobs.id = p_job_id AND jobs.user_id = p_user_id
+  RETURNING jobs.dataset_path, jobs.notebook_path;
+$$ LANGUAGE sql;
+
+REVOKE EXECUTE ON FUNCTION delete_job_owned(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION delete_job_owned(UUID, UUID) TO service_role;
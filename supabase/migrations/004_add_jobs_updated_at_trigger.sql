@@ -0,0 +1,17 @@
+-- SLMGEN Schema Migration: Database-Side Job Timestamps
+-- Run this in Supabase SQL Editor if you already have the base schema
+-- (apply before deploying a backend that no longer sends updated_at)
+
+-- Keep updated_at current on every write, using the database's clock
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs_set_updated_at ON jobs;
+CREATE TRIGGER jobs_set_updated_at
+  BEFORE UPDATE ON jobs
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
@@ -88,6 +88,34 @@ CREATE TABLE IF NOT EXISTS jobs (
 CREATE INDEX IF NOT EXISTS idx_jobs_user_id ON jobs(user_id);
 CREATE INDEX IF NOT EXISTS idx_jobs_session_id ON jobs(session_id);
 CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at DESC);
+-- Keyset pagination for GET /jobs (user's jobs, newest first, id as tiebreaker)
+CREATE INDEX IF NOT EXISTS idx_jobs_user_created_id ON jobs(user_id, created_at DESC, id DESC);
+
+-- Ownership check + delete in one round-trip; returns the storage paths to clean up.
+-- Backend-only (service role) - it trusts the user_id it's given.
+CREATE OR REPLACE FUNCTION delete_job_owned(p_job_id UUID, p_user_id UUID)
+RETURNS TABLE (dataset_path TEXT, notebook_path TEXT) AS $$
+  DELETE FROM jobs
+  WHERE jobs.id = p_job_id AND jobs.user_id = p_user_id
+  RETURNING jobs.dataset_path, jobs.notebook_path;
+$$ LANGUAGE sql;
+
+REVOKE EXECUTE ON FUNCTION delete_job_owned(UUID, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION delete_job_owned(UUID, UUID) TO service_role;
+
+-- Keep updated_at current on every write, using the database's clock
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = NOW();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs_set_updated_at ON jobs;
+CREATE TRIGGER jobs_set_updated_at
+  BEFORE UPDATE ON jobs
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
 
 -- ============================================
 -- DATASETS TABLE